@@ -0,0 +1,7 @@
+"""src.common.logger 的替身：只输出WARNING及以上，避免日志I/O干扰计时"""
+import logging
+
+logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s %(message)s")
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,4 @@
+"""src.config.config 的替身"""
+from types import SimpleNamespace
+
+global_config = SimpleNamespace(bot=SimpleNamespace(qq_account=10001))
@@ -0,0 +1,6 @@
+"""src.config.official_configs 的替身"""
+from typing import Optional
+
+class ChatConfig:
+    def talk_frequency(self, chat_stream_id: Optional[str] = None) -> float:
+        return 1.0
@@ -0,0 +1 @@
+from . import chat_api, component_manage_api, generator_api, message_api, send_api
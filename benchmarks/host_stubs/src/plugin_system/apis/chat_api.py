@@ -0,0 +1,4 @@
+"""chat_api 的替身：没有任何已知的群聊"""
+
+def get_group_streams(platform="qq"):
+    return []
@@ -0,0 +1,22 @@
+"""component_manage_api 的替身：记录调用次数，组件集合可由基准测试设置"""
+from typing import Dict
+from src.plugin_system.base.component_types import ComponentType
+
+calls = 0
+enabled: Dict[ComponentType, Dict[str, object]] = {
+    ComponentType.ACTION: {"reply": None, "no_reply": None, "silence_action": None, "silence_stop_action": None},
+    ComponentType.COMMAND: {"silence_command": None},
+}
+
+def get_enabled_components_info_by_type(component_type: ComponentType) -> Dict[str, object]:
+    return dict(enabled.get(component_type, {}))
+
+def locally_enable_component(component_name: str, component_type: ComponentType, stream_id: str) -> bool:
+    global calls
+    calls += 1
+    return True
+
+def locally_disable_component(component_name: str, component_type: ComponentType, stream_id: str) -> bool:
+    global calls
+    calls += 1
+    return True
@@ -0,0 +1,9 @@
+"""generator_api 的替身：可配置延迟，直接返回原文"""
+import asyncio
+
+delay = 0.0
+
+async def rewrite_reply(chat_stream=None, raw_reply: str = "", reason: str = "", return_prompt: bool = False, **kwargs):
+    if delay:
+        await asyncio.sleep(delay)
+    return True, [("text", raw_reply)], ""
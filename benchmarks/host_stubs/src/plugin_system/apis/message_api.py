@@ -0,0 +1,4 @@
+"""message_api 的替身：没有任何已存储的消息"""
+
+def get_messages_by_time_in_chat(chat_id, start_time, end_time, limit=0, limit_mode="latest", filter_mai=False, filter_command=False):
+    return []
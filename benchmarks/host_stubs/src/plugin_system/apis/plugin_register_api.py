@@ -0,0 +1,2 @@
+def register_plugin(cls):
+    return cls
@@ -0,0 +1,12 @@
+"""send_api 的替身：只计数"""
+sent = 0
+
+async def text_to_stream(text: str, stream_id: str, **kwargs) -> bool:
+    global sent
+    sent += 1
+    return True
+
+async def emoji_to_stream(emoji_base64: str, stream_id: str, **kwargs) -> bool:
+    global sent
+    sent += 1
+    return True
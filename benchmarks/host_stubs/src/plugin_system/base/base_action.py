@@ -0,0 +1,15 @@
+from enum import Enum
+
+class ActionActivationType(Enum):
+    ALWAYS = "always"
+    KEYWORD = "keyword"
+
+class ChatMode(Enum):
+    FOCUS = "focus"
+    NORMAL = "normal"
+    ALL = "all"
+
+class BaseAction:
+    @classmethod
+    def get_action_info(cls):
+        return cls.__name__
@@ -0,0 +1,4 @@
+class BaseCommand:
+    @classmethod
+    def get_command_info(cls):
+        return cls.__name__
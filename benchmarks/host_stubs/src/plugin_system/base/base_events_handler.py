@@ -0,0 +1,4 @@
+class BaseEventHandler:
+    @classmethod
+    def get_handler_info(cls):
+        return cls.__name__
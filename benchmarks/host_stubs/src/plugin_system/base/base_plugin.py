@@ -0,0 +1,11 @@
+class BasePlugin:
+    def __init__(self, *args, **kwargs):
+        self.config = kwargs.get("config", {})
+
+    def get_config(self, key, default=None):
+        value = self.config
+        for part in key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return default
+            value = value[part]
+        return value
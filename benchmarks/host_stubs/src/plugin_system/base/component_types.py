@@ -0,0 +1,25 @@
+"""component_types 的替身"""
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+class ComponentType(Enum):
+    ACTION = "action"
+    COMMAND = "command"
+    EVENT_HANDLER = "event_handler"
+
+class EventType(Enum):
+    ON_START = "on_start"
+    ON_STOP = "on_stop"
+    ON_MESSAGE = "on_message"
+    ON_PLAN = "on_plan"
+
+class ComponentInfo:
+    pass
+
+@dataclass
+class MaiMessages:
+    message_segments: List[Any] = field(default_factory=list)
+    message_base_info: Dict[str, Any] = field(default_factory=dict)
+    plain_text: str = ""
+    stream_id: Optional[str] = None
@@ -0,0 +1,3 @@
+class ConfigField:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
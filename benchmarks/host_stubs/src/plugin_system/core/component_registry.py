@@ -0,0 +1,5 @@
+class ComponentRegistry:
+    def register_component(self, component_info, component_class) -> bool:
+        return True
+
+component_registry = ComponentRegistry()
@@ -0,0 +1,237 @@
+"""
+沉默插件基准测试，无需启动麦麦
+
+在仓库根目录执行:
+    python -m benchmarks.run_benchmarks [--sizes 10,100,1000,10000,100000] [--backend json|sqlite|sharded] [--output bench.json]
+
+- host_stubs/ 提供 src.plugin_system.apis、src.config.official_configs.ChatConfig 等宿主模块的本地替身
+- plugin.py 依赖 toml，运行前需要 pip install toml
+- 结果为JSON，包含插件版本与运行环境，便于跨版本追踪性能回退
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+# 插件以 plugins.silence_plugin 的路径导入自身模块，宿主模块由host_stubs替代
+sys.path.insert(0, os.path.join(BENCH_DIR, "host_stubs"))
+if "plugins" not in sys.modules:
+    plugins_package = types.ModuleType("plugins")
+    plugins_package.__path__ = [REPO_ROOT]
+    sys.modules["plugins"] = plugins_package
+
+from src.config.official_configs import ChatConfig  # noqa: E402
+from plugins.silence_plugin import plugin as silence_plugin  # noqa: E402
+from plugins.silence_plugin.silence_core import SilenceCore  # noqa: E402
+from plugins.silence_plugin.component_toggle import ComponentToggle  # noqa: E402
+from plugins.silence_plugin.component_sets import ComponentSets  # noqa: E402
+from plugins.silence_plugin.announcer import SilenceAnnouncer  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+# 被测的存储后端，由 --backend 指定
+BACKEND = "json"
+# 每个热路径指标的调用次数
+HOT_PATH_CALLS = 200000
+# 每个规模下测量add/remove的聊天流数量
+TRANSITIONS = 500
+
+# 打补丁前的原方法，作为talk_frequency开销的基线
+ORIGINAL_TALK_FREQUENCY = ChatConfig.talk_frequency
+
+def _stream_id(i: int) -> str:
+    return f"bench_stream_{i}"
+
+def _reset(work_dir: str):
+    """为每个规模使用全新的存储文件和空状态"""
+    if SilenceCore._storage is not None:
+        SilenceCore.flush()
+        SilenceCore._storage.close()
+    ComponentToggle._applied.clear()
+    ComponentSets.reset()
+    SilenceCore.init(os.path.join(work_dir, "silence_restrictions.json"), backend=BACKEND)
+
+def _populate(count: int, expiration_offset: float):
+    """直接写入count个沉默状态（绕过LLM回复与组件开关，只为构造规模）"""
+    expiration = time.time() + expiration_offset
+    set_id = ComponentSets.intern(["reply"], [])
+    for i in range(count):
+        SilenceCore._put(_stream_id(i), {"expiration": expiration, "components": set_id})
+        SilenceCore._schedule_expiry(_stream_id(i), expiration)
+    SilenceCore.flush()
+
+def _ns_per_call(func: Callable[[str], object], stream_ids: List[str]) -> float:
+    start = time.perf_counter_ns()
+    for stream_id in stream_ids:
+        func(stream_id)
+    return (time.perf_counter_ns() - start) / len(stream_ids)
+
+def _call_ids(prefix_range: int, offset: int = 0) -> List[str]:
+    return [_stream_id(offset + i % max(prefix_range, 1)) for i in range(HOT_PATH_CALLS)]
+
+def bench_hot_path(size: int) -> Dict[str, float]:
+    """is_silenced与talk_frequency的单次调用开销"""
+    config = ChatConfig()
+    hits = _call_ids(size)
+    misses = _call_ids(size, offset=size)
+
+    def talk_frequency(stream_id: str) -> float:
+        return config.talk_frequency(stream_id)
+
+    def original_talk_frequency(stream_id: str) -> float:
+        return ORIGINAL_TALK_FREQUENCY(config, stream_id)
+
+    return {
+        "is_silenced_hit_ns": _ns_per_call(SilenceCore.is_silenced, hits),
+        "is_silenced_miss_ns": _ns_per_call(SilenceCore.is_silenced, misses),
+        "talk_frequency_unpatched_ns": _ns_per_call(original_talk_frequency, misses),
+        "talk_frequency_silenced_ns": _ns_per_call(talk_frequency, hits),
+        "talk_frequency_not_silenced_ns": _ns_per_call(talk_frequency, misses),
+    }
+
+def bench_idle_talk_frequency() -> Dict[str, float]:
+    """没有任何沉默时，打过补丁的talk_frequency应与原方法开销一致"""
+    config = ChatConfig()
+    ids = _call_ids(1000)
+
+    def talk_frequency(stream_id: str) -> float:
+        return config.talk_frequency(stream_id)
+
+    def original_talk_frequency(stream_id: str) -> float:
+        return ORIGINAL_TALK_FREQUENCY(config, stream_id)
+
+    return {
+        "talk_frequency_unpatched_ns": _ns_per_call(original_talk_frequency, ids),
+        "talk_frequency_idle_ns": _ns_per_call(talk_frequency, ids),
+        "patch_installed": ChatConfig.talk_frequency is not ORIGINAL_TALK_FREQUENCY,
+    }
+
+async def bench_transitions(size: int) -> Dict[str, float]:
+    """在已有size个沉默的情况下，add_silence/remove_silence的平均耗时"""
+    count = min(size, TRANSITIONS)
+    stream_ids = [f"bench_transition_{i}" for i in range(count)]
+
+    start = time.perf_counter_ns()
+    for stream_id in stream_ids:
+        await SilenceCore.add_silence(True, None, stream_id, 3600, ["reply", "no_reply"], [])
+    add_ns = (time.perf_counter_ns() - start) / count
+
+    start = time.perf_counter_ns()
+    for stream_id in stream_ids:
+        await SilenceCore.remove_silence(True, None, stream_id)
+    remove_ns = (time.perf_counter_ns() - start) / count
+
+    # 等待后台回复与刷写结束，不计入状态转换耗时
+    await SilenceAnnouncer.join()
+    start = time.perf_counter_ns()
+    SilenceCore.flush()
+    flush_ns = time.perf_counter_ns() - start
+
+    return {"add_silence_ns": add_ns, "remove_silence_ns": remove_ns, "flush_after_transitions_ns": flush_ns}
+
+def bench_expiry_sweep(size: int) -> Dict[str, float]:
+    """size个聊天流同时到期时，一次清理的总耗时"""
+    _populate(size, expiration_offset=-1)
+    start = time.perf_counter_ns()
+    expired = SilenceCore.manual_cleanup_expired()
+    sweep_ns = time.perf_counter_ns() - start
+
+    start = time.perf_counter_ns()
+    SilenceCore.flush()
+    flush_ns = time.perf_counter_ns() - start
+    return {"expired": expired, "expiry_sweep_ns": sweep_ns, "expiry_flush_ns": flush_ns}
+
+def bench_startup(work_dir: str, size: int) -> Dict[str, float]:
+    """重启场景：size个持久化的沉默（一半已过期）从加载到恢复完成的耗时"""
+    json_file = os.path.join(work_dir, "silence_restrictions.json")
+    _reset(work_dir)
+    now = time.time()
+    set_id = ComponentSets.intern(["reply"], [])
+    for i in range(size):
+        expiration = now + 3600 if i % 2 else now - 3600
+        SilenceCore._put(_stream_id(i), {"expiration": expiration, "components": set_id})
+    SilenceCore.flush()
+    SilenceCore._storage.close()
+    SilenceCore._data = {}
+    ComponentToggle._applied.clear()
+    ComponentSets.reset()
+
+    start = time.perf_counter_ns()
+    SilenceCore.init(json_file, backend=BACKEND)
+    load_ns = time.perf_counter_ns() - start
+    start = time.perf_counter_ns()
+    active, expired = SilenceCore.reconcile()
+    reconcile_ns = time.perf_counter_ns() - start
+    return {"active": active, "expired": expired, "startup_load_ns": load_ns, "startup_reconcile_ns": reconcile_ns}
+
+def _plugin_version() -> str:
+    try:
+        with open(os.path.join(REPO_ROOT, "silence_plugin", "_manifest.json"), 'r', encoding='utf-8') as f:
+            return json.load(f).get("version", "unknown")
+    except Exception:
+        return "unknown"
+
+async def run(sizes: List[int]) -> Dict:
+    silence_plugin.apply_silence_patch_once()
+    # 只测量状态转换本身，回复不限速
+    SilenceAnnouncer.configure(timeout=10.0, rate=0)
+    results = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        _reset(os.path.join(work_dir, "idle"))
+        results.append({"benchmark": "idle_talk_frequency", "streams": 0, **bench_idle_talk_frequency()})
+
+        for size in sizes:
+            _reset(os.path.join(work_dir, f"hot_{size}"))
+            _populate(size, expiration_offset=3600)
+            results.append({"benchmark": "hot_path", "streams": size, **bench_hot_path(size)})
+            results.append({"benchmark": "transitions", "streams": size, **await bench_transitions(size)})
+
+            _reset(os.path.join(work_dir, f"expiry_{size}"))
+            results.append({"benchmark": "expiry_sweep", "streams": size, **bench_expiry_sweep(size)})
+
+            results.append({"benchmark": "startup", "streams": size, **bench_startup(os.path.join(work_dir, f"startup_{size}"), size)})
+
+        SilenceCore.flush()
+        SilenceCore._storage.close()
+
+    return {
+        "meta": {
+            "plugin_version": _plugin_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "hot_path_calls": HOT_PATH_CALLS,
+            "backend": BACKEND,
+        },
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="沉默插件基准测试")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="逗号分隔的沉默聊天流数量")
+    parser.add_argument("--backend", default="json", choices=["json", "sqlite", "sharded"], help="被测的存储后端")
+    parser.add_argument("--output", help="结果JSON的输出路径，默认输出到标准输出")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    global BACKEND
+    BACKEND = args.backend
+    report = asyncio.run(run(sizes))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
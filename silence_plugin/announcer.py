@@ -0,0 +1,330 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from src.common.logger import get_logger
+from src.plugin_system.apis import generator_api, send_api
+from plugins.silence_plugin.metrics import SilenceMetrics
+from plugins.silence_plugin.tracing import SilenceTracer
+
+logger = get_logger("Silence")
+
+# 各类状态转换的回复模板: (raw_reply, reason)
+SILENCE_REPLIES = {
+    "command_mute": ("好吧...", "用户将你禁言，表现出失落难过，简短的一句话，必须回复内容"),
+    "action_mute": ("我先不说话了", "你打算自己禁言自己，简短的一句话，必须回复内容"),
+    "command_unmute": ("又能说话了！", "你的禁言时间到或被用户取消，表现出开心兴奋，简短的一句话，必须回复内容"),
+    "action_unmute": ("我可以说话了", "你自行禁言时间结束，简短的一句话，必须回复内容"),
+}
+
+# 沉默开始后预先生成哪一种解除沉默的回复
+_PREFILL_AFTER = {
+    "command_mute": "command_unmute",
+    "action_mute": "action_unmute",
+}
+
+def _consume_result(task: asyncio.Future):
+    """取走已放弃的任务的结果，避免事件循环报告"exception was never retrieved" """
+    if not task.cancelled():
+        task.exception()
+
+class ReplyPool:
+    """
+    预生成回复池
+    - 按转换类型保存少量已生成的回复，所有聊天流共用，取用时无需等待LLM
+    - 回复只与人设和转换类型有关，在TTL内可以用于任意聊天流，超过TTL即失效
+    """
+
+    _pools: Dict[str, List[Tuple[float, List[Tuple[str, Any]]]]] = {}
+    # 正在后台生成的转换类型，避免重复生成
+    _refilling: Set[str] = set()
+    _pool_size: int = 1
+    _ttl: float = 1800.0
+
+    @classmethod
+    def configure(cls, pool_size: int, ttl: float):
+        cls._pool_size = pool_size
+        cls._ttl = ttl
+
+    @classmethod
+    def take(cls, kind: str) -> Optional[List[Tuple[str, Any]]]:
+        """取出一条未过期的预生成回复，没有时返回None"""
+        pool = cls._pools.get(kind)
+        deadline = time.monotonic() - cls._ttl
+        while pool:
+            created_at, reply_set = pool.pop(0)
+            if created_at >= deadline:
+                return reply_set
+        return None
+
+    @classmethod
+    def _fresh_count(cls, kind: str) -> int:
+        """丢弃已过期的回复，返回仍可使用的数量"""
+        pool = cls._pools.get(kind, [])
+        deadline = time.monotonic() - cls._ttl
+        while pool and pool[0][0] < deadline:
+            pool.pop(0)
+        return len(pool)
+
+    @classmethod
+    def refill(cls, kind: str, stream: Any, stream_id: str):
+        """在后台把池补满（借用该聊天流作为生成时的上下文），立即返回"""
+        if cls._pool_size <= 0 or kind in cls._refilling or cls._fresh_count(kind) >= cls._pool_size:
+            return
+        cls._refilling.add(kind)
+        SilenceAnnouncer._track(asyncio.get_running_loop().create_task(cls._refill(kind, stream, stream_id)))
+
+    @classmethod
+    async def _refill(cls, kind: str, stream: Any, stream_id: str):
+        try:
+            while cls._fresh_count(kind) < cls._pool_size:
+                reply_set = await SilenceAnnouncer._rewrite(kind, stream, stream_id)
+                if not reply_set:
+                    break
+                cls._pools.setdefault(kind, []).append((time.monotonic(), reply_set))
+            logger.debug(f"已预生成 {kind} 回复")
+        except Exception as e:
+            logger.warning(f"预生成沉默回复失败: {str(e)}")
+        finally:
+            cls._refilling.discard(kind)
+
+class SilenceAnnouncer:
+    """
+    沉默/解除沉默时的回复
+    - 所有回复进入同一个队列，由固定数量的工作协程生成和发送，状态转换从不等待回复
+    - 全局限速，避免大量聊天流同时变化时压垮LLM或触发平台的发送频率限制
+    - 同一聊天流排队中的回复只保留最新的一条；发送前聊天流状态已经改变或排队过久的回复直接丢弃
+    - 优先使用ReplyPool中预生成的回复，LLM超时或失败时退回到raw_reply原文
+    """
+
+    # 等待LLM生成回复的最长时间（秒）
+    _timeout: float = 10.0
+    # 同时生成/发送回复的数量上限（工作协程数）
+    _concurrency: int = 4
+    # 每秒最多开始处理的回复数，0表示不限速
+    _rate: float = 2.0
+    # 回复排队超过该时间（秒）后不再发送，0表示不限制
+    _max_delay: float = 300.0
+    # 沉默到期时是否也发送解除沉默的回复
+    _announce_expiry: bool = False
+    # 查询聊天流当前是否在沉默中，用于丢弃状态已经改变的回复（由SilenceCore注入，避免循环导入）
+    _is_silenced: Optional[Callable[[str], bool]] = None
+    # 排队中的回复: 聊天流ID -> (类型, 聊天流对象, 入队时间)
+    _queue: "OrderedDict[str, Tuple[str, Any, float]]" = OrderedDict()
+    _queue_event: Optional[asyncio.Event] = None
+    _workers: Set[asyncio.Task] = set()
+    # 正在处理的回复数
+    _active: int = 0
+    # 限速：下一条回复最早可以开始的时刻（monotonic）
+    _next_slot: float = 0.0
+    # 持有后台任务的引用，避免被垃圾回收
+    _tasks: Set[asyncio.Task] = set()
+    # 等待全部处理完的join调用，最后一项处理完时唤醒
+    _drain_waiters: List[asyncio.Future] = []
+
+    @classmethod
+    def configure(cls, timeout: float, concurrency: int = 4, rate: float = 2.0,
+                  max_delay: float = 300.0, announce_expiry: bool = False):
+        cls._timeout = timeout
+        cls._concurrency = max(1, concurrency)
+        cls._rate = max(0.0, rate)
+        cls._max_delay = max(0.0, max_delay)
+        cls._announce_expiry = announce_expiry
+
+    @classmethod
+    def set_state_checker(cls, is_silenced: Callable[[str], bool]):
+        cls._is_silenced = is_silenced
+
+    @classmethod
+    def announce(cls, kind: str, stream: Any, stream_id: str):
+        """把回复放入队列，立即返回"""
+        cls.announce_many(kind, [(stream, stream_id)])
+
+    @classmethod
+    def announce_many(cls, kind: str, targets: List[Tuple[Any, str]]):
+        """批量把回复放入队列，立即返回"""
+        if not targets:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug(f"没有运行中的事件循环，跳过 {len(targets)} 条 {kind} 回复")
+            return
+
+        now = time.monotonic()
+        for stream, stream_id in targets:
+            if cls._queue.pop(stream_id, None) is not None:
+                SilenceMetrics.incr("announce.coalesced")
+            cls._queue[stream_id] = (kind, stream, now)
+        cls._ensure_workers()
+        cls._queue_event.set()
+
+    @classmethod
+    def announce_expiry(cls, stream_id: str, source: str):
+        """沉默到期后的回复，仅在开启了到期回复时发送（定时沉默的时段结束不发送）"""
+        if cls._announce_expiry and source != "schedule":
+            cls.announce("action_unmute" if source == "action" else "command_unmute", None, stream_id)
+
+    @classmethod
+    def queue_size(cls) -> int:
+        return len(cls._queue)
+
+    @classmethod
+    async def join(cls):
+        """等待队列中的回复与后台预生成全部处理完，由最后完成的一项唤醒"""
+        if not cls._busy():
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        cls._drain_waiters.append(waiter)
+        await waiter
+
+    @classmethod
+    def _busy(cls) -> bool:
+        return bool(cls._queue or cls._active or cls._tasks)
+
+    @classmethod
+    def _notify_if_drained(cls):
+        if cls._busy():
+            return
+        waiters, cls._drain_waiters = cls._drain_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @classmethod
+    def _track(cls, task: asyncio.Task):
+        """登记后台任务，结束时检查是否已经全部处理完"""
+        cls._tasks.add(task)
+        task.add_done_callback(cls._task_done)
+
+    @classmethod
+    def _task_done(cls, task: asyncio.Task):
+        cls._tasks.discard(task)
+        cls._notify_if_drained()
+
+    @classmethod
+    def _ensure_workers(cls):
+        cls._workers = {worker for worker in cls._workers if not worker.done()}
+        if not cls._workers:
+            cls._queue_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        while len(cls._workers) < cls._concurrency:
+            cls._workers.add(loop.create_task(cls._worker()))
+
+    @classmethod
+    async def _worker(cls):
+        while True:
+            if not cls._queue:
+                cls._queue_event.clear()
+                await cls._queue_event.wait()
+                continue
+
+            stream_id, (kind, stream, enqueued_at) = cls._queue.popitem(last=False)
+            cls._active += 1
+            try:
+                await cls._throttle()
+                # 限速等待期间聊天流可能又有了新的回复或改变了状态
+                if stream_id in cls._queue or cls._is_stale(kind, stream_id, enqueued_at):
+                    SilenceMetrics.incr("announce.dropped_stale")
+                    logger.debug(f"聊天流 {stream_id} 的 {kind} 回复已过时，不再发送")
+                    continue
+                await cls._announce(kind, stream, stream_id)
+            finally:
+                cls._active -= 1
+                cls._notify_if_drained()
+
+    @classmethod
+    async def _throttle(cls):
+        """令牌式限速：每条回复预约一个时间片，时间片未到则等待"""
+        if cls._rate <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, cls._next_slot)
+        cls._next_slot = slot + 1 / cls._rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    @classmethod
+    def _is_stale(cls, kind: str, stream_id: str, enqueued_at: float) -> bool:
+        if cls._max_delay and time.monotonic() - enqueued_at > cls._max_delay:
+            return True
+        if cls._is_silenced is None:
+            return False
+        # 沉默类回复要求仍在沉默中，解除沉默类回复要求已不在沉默中
+        return cls._is_silenced(stream_id) != kind.endswith("_mute")
+
+    @classmethod
+    async def _announce(cls, kind: str, stream: Any, stream_id: str):
+        try:
+            with SilenceTracer.span("announce", stream_id, kind=kind):
+                reply_set = await cls._generate(kind, stream, stream_id)
+                with SilenceTracer.span("send"):
+                    await cls._send(stream_id, reply_set)
+            SilenceMetrics.incr("announce.sent")
+        except Exception as e:
+            logger.error(f"发送沉默回复时出错: {str(e)}")
+
+        # 聊天流进入沉默后处于空闲状态，趁机预生成之后解除沉默时的回复（池已满时不调用LLM）
+        prefill_kind = _PREFILL_AFTER.get(kind)
+        if prefill_kind:
+            ReplyPool.refill(prefill_kind, stream, stream_id)
+
+    @classmethod
+    async def _generate(cls, kind: str, stream: Any, stream_id: str) -> List[Tuple[str, Any]]:
+        """优先取用预生成的回复，否则调用LLM改写，超时或失败时使用原文"""
+        reply_set = ReplyPool.take(kind)
+        if reply_set:
+            SilenceMetrics.incr("reply_pool.hit")
+            return reply_set
+        SilenceMetrics.incr("reply_pool.miss")
+
+        reply_set = await cls._rewrite(kind, stream, stream_id)
+        if reply_set:
+            return reply_set
+        SilenceMetrics.incr("announce.fallback")
+        return [("text", SILENCE_REPLIES[kind][0])]
+
+    @classmethod
+    async def _rewrite(cls, kind: str, stream: Any, stream_id: str) -> Optional[List[Tuple[str, Any]]]:
+        """调用LLM改写回复，超时或失败时返回None"""
+        raw_reply, reason = SILENCE_REPLIES[kind]
+        # 到期等场景拿不到聊天流对象，改为按聊天流ID查找
+        target = {"chat_stream": stream} if stream is not None else {"chat_id": stream_id}
+        try:
+            with SilenceMetrics.timer("llm.rewrite"), SilenceTracer.span("rewrite", kind=kind):
+                # 用asyncio.wait而不是wait_for，避免生成完成与取消同时发生时取消被吞掉，导致工作协程无法退出
+                rewrite = asyncio.ensure_future(generator_api.rewrite_reply(
+                    **target,
+                    raw_reply=raw_reply,
+                    reason=reason,
+                    return_prompt=True
+                ))
+                try:
+                    await asyncio.wait({rewrite}, timeout=cls._timeout)
+                finally:
+                    # cancel()之后任务要到下一轮事件循环才真正结束，不等待它，只在结束时取走结果
+                    if not rewrite.done():
+                        rewrite.cancel()
+                        rewrite.add_done_callback(_consume_result)
+                if not rewrite.done() or rewrite.cancelled():
+                    raise asyncio.TimeoutError()
+                success, reply_set, prompt = rewrite.result()
+            logger.debug(prompt)
+            if success and reply_set:
+                return reply_set
+            SilenceMetrics.incr("llm.failed")
+        except asyncio.TimeoutError:
+            SilenceMetrics.incr("llm.timeout")
+            logger.warning(f"生成沉默回复超时（{cls._timeout}秒），使用原文回复")
+        except Exception as e:
+            SilenceMetrics.incr("llm.failed")
+            logger.error(f"生成沉默回复失败，使用原文回复: {str(e)}")
+        return None
+
+    @staticmethod
+    async def _send(stream_id: str, reply_set: Optional[List[Tuple[str, Any]]]):
+        for reply_type, reply_content in reply_set or []:
+            if reply_type == "text":
+                await send_api.text_to_stream(text=reply_content, stream_id=stream_id)
+            elif reply_type == "emoji":
+                await send_api.emoji_to_stream(emoji_base64=reply_content, stream_id=stream_id)
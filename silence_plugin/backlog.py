@@ -0,0 +1,50 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List
+
+class SilenceBacklog:
+    """
+    深度沉默期间被跳过的消息的精简记录
+    - 每个聊天流只保留最近的若干条（发送者与截断后的文本），超出时丢弃最早的
+    - 记录的聊天流数量也有上限，按最近使用淘汰
+    - 沉默结束时由SilenceStopAction一次性取出，作为错过的上下文写入动作记录
+    """
+
+    _backlogs: "OrderedDict[str, Deque[Dict]]" = OrderedDict()
+    _max_streams: int = 256
+    # 每条记录保留的最大文本长度
+    _max_text: int = 100
+
+    @classmethod
+    def record(cls, stream_id: str, sender: str, text: str, size: int):
+        if size <= 0:
+            return
+        backlog = cls._backlogs.get(stream_id)
+        if backlog is None or backlog.maxlen != size:
+            backlog = cls._backlogs[stream_id] = deque(backlog or (), maxlen=size)
+            while len(cls._backlogs) > cls._max_streams:
+                cls._backlogs.popitem(last=False)
+        cls._backlogs.move_to_end(stream_id)
+        backlog.append({"time": time.time(), "sender": sender, "text": text[:cls._max_text]})
+
+    @classmethod
+    def take(cls, stream_id: str) -> List[Dict]:
+        """取出并清空该聊天流的记录"""
+        return list(cls._backlogs.pop(stream_id, ()))
+
+    @classmethod
+    def discard(cls, stream_id: str):
+        cls._backlogs.pop(stream_id, None)
+
+    @classmethod
+    def summarize(cls, stream_id: str) -> str:
+        """取出记录并整理为一段文本，没有记录时返回空字符串"""
+        records = cls.take(stream_id)
+        if not records:
+            return ""
+        lines = [f"{record['sender']}: {record['text']}" for record in records]
+        return f"沉默期间跳过的最近{len(records)}条消息：\n" + "\n".join(lines)
+
+    @classmethod
+    def size(cls) -> int:
+        return sum(len(backlog) for backlog in cls._backlogs.values())
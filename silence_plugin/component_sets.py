@@ -0,0 +1,124 @@
+import hashlib
+import json
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+from src.common.logger import get_logger
+
+logger = get_logger("Silence")
+
+_EMPTY_SET: Tuple[FrozenSet[str], FrozenSet[str]] = (frozenset(), frozenset())
+
+class ComponentSets:
+    """
+    按内容寻址的组件集合表
+    - 同一组 (disabled_actions, disabled_commands) 只保存一份，沉默状态中只记录集合ID
+    - 集合ID是排序后内容的哈希，不同进程对同一内容得到同一个ID，不会冲突
+    - 内存与文件大小只随不同集合的数量增长，而不是聊天流数量×组件数量
+    """
+
+    # 集合ID -> (actions, commands)
+    _sets: Dict[str, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+    # (actions, commands) -> 集合ID，避免重复计算哈希
+    _ids: Dict[Tuple[FrozenSet[str], FrozenSet[str]], str] = {}
+    # 尚未写入存储的新增/删除
+    _added: Set[str] = set()
+    _removed: Set[str] = set()
+
+    @staticmethod
+    def _make_id(actions: FrozenSet[str], commands: FrozenSet[str]) -> str:
+        content = json.dumps([sorted(actions), sorted(commands)], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def intern(cls, actions: Iterable[str], commands: Iterable[str]) -> str:
+        """登记一组组件并返回其集合ID，已存在时不产生任何写入"""
+        key = (frozenset(actions), frozenset(commands))
+        set_id = cls._ids.get(key)
+        if set_id is not None:
+            return set_id
+
+        set_id = cls._make_id(*key)
+        cls._sets[set_id] = key
+        cls._ids[key] = set_id
+        cls._added.add(set_id)
+        cls._removed.discard(set_id)
+        return set_id
+
+    @classmethod
+    def get(cls, set_id: Optional[str]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        if set_id is None:
+            return _EMPTY_SET
+        components = cls._sets.get(set_id)
+        if components is None:
+            logger.warning(f"找不到组件集合 {set_id}，按空集合处理")
+            return _EMPTY_SET
+        return components
+
+    @classmethod
+    def resolve(cls, stream_data: Dict) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """取出沉默状态对应的 (actions, commands)，兼容旧版内联列表的记录"""
+        if "components" in stream_data:
+            return cls.get(stream_data["components"])
+        return cls.get(cls.intern(stream_data.get("disabled_actions", []), stream_data.get("disabled_commands", [])))
+
+    @classmethod
+    def normalize(cls, stream_data: Dict) -> Dict:
+        """把旧版内联列表的记录转换为引用集合ID的记录，已是新格式时原样返回"""
+        if "components" in stream_data or ("disabled_actions" not in stream_data and "disabled_commands" not in stream_data):
+            return stream_data
+        normalized = {key: value for key, value in stream_data.items() if key not in ("disabled_actions", "disabled_commands")}
+        normalized["components"] = cls.intern(stream_data.get("disabled_actions", []), stream_data.get("disabled_commands", []))
+        return normalized
+
+    @classmethod
+    def load(cls, stored: Dict[str, Dict]):
+        """合并从存储读出的集合表（内容寻址，已有的条目不会变化）"""
+        for set_id, entry in stored.items():
+            if set_id in cls._sets:
+                continue
+            key = (frozenset(entry.get("actions", [])), frozenset(entry.get("commands", [])))
+            cls._sets[set_id] = key
+            cls._ids.setdefault(key, set_id)
+
+    @classmethod
+    def take_changes(cls) -> Optional[Tuple[Dict[str, Dict], Set[str]]]:
+        """取出待写入的 (新增集合, 删除的集合ID)，没有变化时返回None"""
+        if not cls._added and not cls._removed:
+            return None
+        # 刷写在线程池中进行，整体替换而不是原地清空，避免与事件循环中的intern交错
+        added_ids, cls._added = cls._added, set()
+        removed, cls._removed = cls._removed, set()
+        added = {}
+        for set_id in added_ids:
+            components = cls._sets.get(set_id)
+            if components is not None:
+                added[set_id] = {"actions": sorted(components[0]), "commands": sorted(components[1])}
+        return added, removed
+
+    @classmethod
+    def restore_changes(cls, added: Dict[str, Dict], removed: Set[str]):
+        """写入失败时放回待写入队列"""
+        cls._added.update(set_id for set_id in added if set_id in cls._sets)
+        cls._removed.update(set_id for set_id in removed if set_id not in cls._sets)
+
+    @classmethod
+    def prune(cls, referenced: Iterable[Optional[str]]) -> int:
+        """删除不再被任何沉默状态引用的集合，返回删除数量"""
+        keep = set(referenced)
+        unused = [set_id for set_id in cls._sets if set_id not in keep]
+        for set_id in unused:
+            cls._ids.pop(cls._sets.pop(set_id), None)
+            cls._added.discard(set_id)
+            cls._removed.add(set_id)
+        return len(unused)
+
+    @classmethod
+    def count(cls) -> int:
+        return len(cls._sets)
+
+    @classmethod
+    def reset(cls):
+        """清空内存中的集合表（切换存储时使用）"""
+        cls._sets.clear()
+        cls._ids.clear()
+        cls._added.clear()
+        cls._removed.clear()
@@ -0,0 +1,132 @@
+import functools
+import inspect
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from src.plugin_system.apis import component_manage_api
+from src.plugin_system.base.component_types import ComponentType
+from src.common.logger import get_logger
+from plugins.silence_plugin.metrics import SilenceMetrics
+
+logger = get_logger("Silence")
+
+# 会改变已启用组件集合的注册表方法，调用后需要让组件快照失效
+_REGISTRY_MUTATORS = ("register_component", "remove_component", "enable_component", "disable_component")
+
+class ComponentToggle:
+    """
+    组件开关层
+    - 缓存已启用组件的快照，组件注册/注销/全局开关时才失效
+    - 记录每个聊天流当前被本插件局部禁用的组件，只对差异部分调用组件管理API
+    """
+
+    # 已启用组件快照 (actions, commands)，None表示需要重新查询
+    _snapshot: Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]] = None
+    # 是否成功挂上了注册表的失效钩子，没挂上时不使用缓存
+    _hooked: bool = False
+    # 每个聊天流当前由本插件局部禁用的 (actions, commands)
+    _applied: Dict[str, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+
+    @classmethod
+    def install_registry_hook_once(cls):
+        """给组件注册表打补丁，在组件集合变化时清空快照"""
+        if cls._hooked:
+            return
+
+        try:
+            from src.plugin_system.core.component_registry import component_registry
+        except Exception as e:
+            logger.warning(f"无法挂载组件注册表钩子，组件快照将不被缓存: {str(e)}")
+            return
+
+        registry_class = type(component_registry)
+        for method_name in _REGISTRY_MUTATORS:
+            original = getattr(registry_class, method_name, None)
+            if original is None or getattr(original, "_silence_invalidates", False):
+                continue
+            setattr(registry_class, method_name, cls._wrap_mutator(original))
+
+        cls._hooked = True
+        cls.invalidate()
+
+    @classmethod
+    def _wrap_mutator(cls, original):
+        """包装注册表方法，调用完成后让快照失效；协程方法在await完成后才失效"""
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def wrapper(*args, **kwargs):
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    cls.invalidate()
+        else:
+            @functools.wraps(original)
+            def wrapper(*args, **kwargs):
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    cls.invalidate()
+        wrapper._silence_invalidates = True
+        return wrapper
+
+    @classmethod
+    def invalidate(cls):
+        cls._snapshot = None
+
+    @classmethod
+    def enabled_components(cls) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """获取当前全局启用的 (action名, command名)"""
+        if cls._snapshot is not None and cls._hooked:
+            SilenceMetrics.incr("component_snapshot.hit")
+            return cls._snapshot
+
+        SilenceMetrics.incr("component_snapshot.miss")
+        enabled_actions = component_manage_api.get_enabled_components_info_by_type(ComponentType.ACTION)
+        enabled_commands = component_manage_api.get_enabled_components_info_by_type(ComponentType.COMMAND)
+        cls._snapshot = (tuple(enabled_actions.keys()), tuple(enabled_commands.keys()))
+        return cls._snapshot
+
+    @classmethod
+    def disable(cls, stream_id: str, actions: Iterable[str], commands: Iterable[str]) -> Tuple[int, int]:
+        """
+        让聊天流进入沉默时的组件状态，只处理与当前已应用状态的差异
+        返回实际新禁用的 (action数, command数)
+        """
+        target_actions, target_commands = frozenset(actions), frozenset(commands)
+        applied = cls._applied.get(stream_id)
+        applied_actions, applied_commands = applied or (frozenset(), frozenset())
+
+        cls._toggle(stream_id, target_actions - applied_actions, ComponentType.ACTION, enable=False)
+        cls._toggle(stream_id, target_commands - applied_commands, ComponentType.COMMAND, enable=False)
+        # 之前禁用、现在不再需要禁用的组件
+        cls._toggle(stream_id, applied_actions - target_actions, ComponentType.ACTION, enable=True)
+        cls._toggle(stream_id, applied_commands - target_commands, ComponentType.COMMAND, enable=True)
+
+        if applied is None:
+            # 启用SilenceStopAction
+            component_manage_api.locally_enable_component("silence_stop_action", ComponentType.ACTION, stream_id)
+
+        cls._applied[stream_id] = (target_actions, target_commands)
+        return len(target_actions - applied_actions), len(target_commands - applied_commands)
+
+    @classmethod
+    def enable(cls, stream_id: str, actions: Iterable[str], commands: Iterable[str]) -> Tuple[int, int]:
+        """
+        让聊天流恢复到沉默前的组件状态
+        已知应用状态时以其为准；未知时（例如重启后）按传入的列表恢复
+        """
+        applied = cls._applied.pop(stream_id, None)
+        if applied is None:
+            applied = (frozenset(actions), frozenset(commands))
+        applied_actions, applied_commands = applied
+
+        cls._toggle(stream_id, applied_actions, ComponentType.ACTION, enable=True)
+        cls._toggle(stream_id, applied_commands, ComponentType.COMMAND, enable=True)
+        # 禁用SilenceStopAction
+        component_manage_api.locally_disable_component("silence_stop_action", ComponentType.ACTION, stream_id)
+        return len(applied_actions), len(applied_commands)
+
+    @staticmethod
+    def _toggle(stream_id: str, names: Iterable[str], component_type: ComponentType, enable: bool):
+        """一次遍历处理同一聊天流的一批组件"""
+        toggle = component_manage_api.locally_enable_component if enable else component_manage_api.locally_disable_component
+        for name in names:
+            toggle(name, component_type, stream_id)
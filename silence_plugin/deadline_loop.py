@@ -0,0 +1,37 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from src.common.logger import get_logger
+
+logger = get_logger("Silence")
+
+async def run_deadline_loop(name: str, wakeup: asyncio.Event,
+                            run_due: Callable[[float], Awaitable[None]],
+                            next_deadline: Callable[[], Optional[float]]):
+    """
+    截止时间调度循环，到期调度器与定时沉默调度器共用
+    - 处理所有已到点的条目，然后睡到最近的截止时间；没有截止时间时一直睡到被唤醒
+    - 新的截止时间早于当前等待的时间时，调用方设置wakeup让循环重新计算
+    - 用定时器唤醒而不是wait_for，避免唤醒与取消同时发生时取消被吞掉
+    - 单次出错只记录日志，稍后继续运行
+    """
+    while True:
+        try:
+            wakeup.clear()
+            await run_due(time.time())
+
+            deadline = next_deadline()
+            timeout = deadline - time.time() if deadline is not None else None
+            if timeout is not None and timeout <= 0:
+                continue
+            timer = asyncio.get_running_loop().call_later(timeout, wakeup.set) if timeout is not None else None
+            try:
+                await wakeup.wait()
+            finally:
+                if timer:
+                    timer.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{name}出错: {str(e)}")
+            await asyncio.sleep(1)
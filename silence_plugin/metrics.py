@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional
+from src.common.logger import get_logger
+
+logger = get_logger("Silence")
+
+# 延迟直方图的桶上限（秒），最后一个桶收纳所有更慢的样本
+_LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+class _Histogram:
+    """固定桶的延迟直方图，记录一次样本为O(log 桶数)"""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(_LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect_left(_LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """按桶估算的分位数（取所在桶的上限，偏保守，但不超过最大值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return min(_LATENCY_BUCKETS[index], self.max) if index < len(_LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+class _Timer:
+    """with SilenceMetrics.timer(name): ... 记录代码块耗时"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        SilenceMetrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class SilenceMetrics:
+    """
+    插件运行指标
+    - 计数器与延迟直方图全部在内存中，记录一次只是一两次字典操作
+    - 仪表（当前沉默数、挂起的SilenceStopAction数等）在查看时才读取
+    - 通过 /silence stats 查看，或配置 metrics.dump_file 定期导出为JSON
+    """
+
+    _counters: Dict[str, int] = {}
+    _histograms: Dict[str, _Histogram] = {}
+    _gauges: Dict[str, Callable[[], float]] = {}
+    _started_at: float = time.time()
+    # 定期导出的目标文件，空字符串表示不导出
+    _dump_file: str = ""
+    _dump_interval: float = 60.0
+    _dump_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def configure(cls, dump_file: str = "", dump_interval: float = 60.0):
+        cls._dump_file = dump_file
+        cls._dump_interval = dump_interval
+        cls.ensure_dumper()
+
+    @classmethod
+    def incr(cls, name: str, amount: int = 1):
+        cls._counters[name] = cls._counters.get(name, 0) + amount
+
+    @classmethod
+    def observe(cls, name: str, seconds: float):
+        histogram = cls._histograms.get(name)
+        if histogram is None:
+            histogram = cls._histograms[name] = _Histogram()
+        histogram.observe(seconds)
+
+    @classmethod
+    def timer(cls, name: str) -> _Timer:
+        return _Timer(name)
+
+    @classmethod
+    def register_gauge(cls, name: str, getter: Callable[[], float]):
+        cls._gauges[name] = getter
+
+    @classmethod
+    def snapshot(cls) -> Dict:
+        """当前所有指标的快照"""
+        gauges = {}
+        for name, getter in cls._gauges.items():
+            try:
+                gauges[name] = getter()
+            except Exception as e:
+                logger.debug(f"读取指标 {name} 失败: {str(e)}")
+        return {
+            "timestamp": time.time(),
+            "uptime": time.time() - cls._started_at,
+            "counters": dict(sorted(cls._counters.items())),
+            "gauges": gauges,
+            "latency": {name: histogram.to_dict() for name, histogram in sorted(cls._histograms.items())},
+        }
+
+    @classmethod
+    def format_report(cls) -> str:
+        """供 /silence stats 发送的文本报告"""
+        snapshot = cls.snapshot()
+        lines: List[str] = [f"沉默插件运行指标（已运行 {snapshot['uptime'] / 3600:.1f} 小时）"]
+
+        if snapshot["gauges"]:
+            lines.append("[当前状态]")
+            lines.extend(f"{name}: {value}" for name, value in snapshot["gauges"].items())
+        if snapshot["counters"]:
+            lines.append("[计数]")
+            lines.extend(f"{name}: {value}" for name, value in snapshot["counters"].items())
+        if snapshot["latency"]:
+            lines.append("[耗时 ms: 次数 平均/p50/p99/最大]")
+            lines.extend(
+                f"{name}: {h['count']} {h['avg_ms']:.2f}/{h['p50_ms']:.2f}/{h['p99_ms']:.2f}/{h['max_ms']:.2f}"
+                for name, h in snapshot["latency"].items()
+            )
+        return "\n".join(lines)
+
+    @classmethod
+    def dump(cls):
+        """把快照写入dump_file（先写临时文件再原子替换）"""
+        if not cls._dump_file:
+            return
+        try:
+            tmp_file = cls._dump_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(cls.snapshot(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, cls._dump_file)
+        except Exception as e:
+            logger.warning(f"导出沉默插件指标失败: {str(e)}")
+
+    @classmethod
+    def ensure_dumper(cls):
+        """配置了dump_file时在当前事件循环中启动定期导出（没有运行中的事件循环时延后启动）"""
+        if not cls._dump_file or (cls._dump_task is not None and not cls._dump_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        cls._dump_task = loop.create_task(cls._dump_loop())
+
+    @classmethod
+    async def _dump_loop(cls):
+        while cls._dump_file:
+            await asyncio.sleep(cls._dump_interval)
+            await asyncio.get_running_loop().run_in_executor(None, cls.dump)
@@ -0,0 +1,76 @@
+import functools
+import inspect
+import time
+from typing import Callable, Optional
+from src.common.logger import get_logger
+from plugins.silence_plugin.metrics import SilenceMetrics
+
+logger = get_logger("Silence")
+
+# 判断某个聊天流是否应当跳过LLM调用，由插件在安装补丁时提供
+_should_short_circuit: Callable[[Optional[str]], bool] = lambda stream_id: False
+
+def _silenced_plan():
+    """沉默中直接选择SilenceStopAction的规划结果，格式与ActionPlanner.plan的返回值一致"""
+    action_result = {
+        "action_type": "silence_stop_action",
+        "action_data": {},
+        "reasoning": "当前聊天流处于沉默状态，跳过规划",
+        "timestamp": time.time(),
+        "is_parallel": False,
+    }
+    return {"action_result": action_result, "action_prompt": ""}, None
+
+def _wrap_plan(original):
+    @functools.wraps(original)
+    async def plan(self, *args, **kwargs):
+        if _should_short_circuit(getattr(self, "chat_id", None)):
+            SilenceMetrics.incr("planner.skipped")
+            return _silenced_plan()
+        return await original(self, *args, **kwargs)
+    plan._silence_short_circuit = True
+    return plan
+
+def _wrap_generate(original):
+    @functools.wraps(original)
+    async def generate_reply_with_context(self, *args, **kwargs):
+        stream_id = getattr(getattr(self, "chat_stream", None), "stream_id", None)
+        if _should_short_circuit(stream_id):
+            SilenceMetrics.incr("replyer.skipped")
+            return False, None, None
+        return await original(self, *args, **kwargs)
+    generate_reply_with_context._silence_short_circuit = True
+    return generate_reply_with_context
+
+def _patch(owner, method_name: str, wrapper) -> bool:
+    original = getattr(owner, method_name, None)
+    if original is None or not inspect.iscoroutinefunction(original):
+        logger.warning(f"{owner.__name__}.{method_name} 不存在或不是协程，跳过沉默短路补丁")
+        return False
+    if not getattr(original, "_silence_short_circuit", False):
+        setattr(owner, method_name, wrapper(original))
+    return True
+
+def apply_planner_patch_once(should_short_circuit: Callable[[Optional[str]], bool]):
+    """
+    沉默中的聊天流不再调用规划器与回复器的LLM
+    - ActionPlanner.plan 直接返回选择SilenceStopAction的结果，由它等待艾特或到期来解除沉默
+    - 普通模式下与规划并行的回复生成直接返回失败
+    宿主版本不匹配时只跳过对应的补丁，沉默仍由talk_frequency补丁与动作提示保证
+    """
+    global _should_short_circuit
+    _should_short_circuit = should_short_circuit
+
+    try:
+        from src.chat.planner_actions.planner import ActionPlanner
+    except Exception as e:
+        logger.warning(f"无法加载规划器，沉默期间仍会调用规划器: {str(e)}")
+    else:
+        _patch(ActionPlanner, "plan", _wrap_plan)
+
+    try:
+        from src.chat.replyer.default_generator import DefaultReplyer
+    except Exception as e:
+        logger.warning(f"无法加载回复器，沉默期间仍可能生成回复: {str(e)}")
+    else:
+        _patch(DefaultReplyer, "generate_reply_with_context", _wrap_generate)
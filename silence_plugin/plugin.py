@@ -2,26 +2,73 @@ from src.plugin_system.base.base_plugin import BasePlugin
 from src.plugin_system.apis.plugin_register_api import register_plugin
 from src.plugin_system.base.base_action import BaseAction, ActionActivationType, ChatMode
 from src.plugin_system.base.base_command import BaseCommand
+from src.plugin_system.base.base_events_handler import BaseEventHandler
 from src.plugin_system.base.config_types import ConfigField
-from src.plugin_system.base.component_types import ComponentInfo, ComponentType
+from src.plugin_system.base.component_types import ComponentInfo, EventType, MaiMessages
 from src.config.official_configs import ChatConfig
 from src.config.config import global_config
-from src.plugin_system.apis import component_manage_api, message_api
+from src.plugin_system.apis import chat_api, message_api
 from typing import Tuple, Optional, List, Type, Dict, Any
+from functools import lru_cache
 import traceback
 import toml
 import random
 import os
 import time
 import re
-import asyncio
 from src.common.logger import get_logger
 from plugins.silence_plugin.silence_core import SilenceCore
+from plugins.silence_plugin.silence_watcher import SilenceWatcher
+from plugins.silence_plugin.backlog import SilenceBacklog
+from plugins.silence_plugin.schedules import SilenceSchedules, describe_schedule, parse_schedule
+from plugins.silence_plugin.component_toggle import ComponentToggle
+from plugins.silence_plugin.announcer import ReplyPool, SilenceAnnouncer
+from plugins.silence_plugin.metrics import SilenceMetrics
+from plugins.silence_plugin.tracing import SilenceTracer
 from plugins.silence_plugin import logger_patch
+from plugins.silence_plugin.planner_patch import apply_planner_patch_once
 from src.plugin_system.apis import generator_api
 
 logger = get_logger("Silence")
 
+# 沉默补丁的运行时状态：由SilenceCore的变化回调维护
+# - _silence_index: SilenceCore的内存索引（只读引用）
+# - _next_expiry: 最早的到期时间，在此之前集合中的聊天流无需再检查是否过期
+# - _inner_talk_frequency: 被包装的原方法（安装补丁时的ChatConfig.talk_frequency）
+# - _patch_installed: 补丁是否仍在调用链中（其他插件可能在它外面又包了一层，此时无法移除）
+_silence_index: Dict[str, Dict] = {}
+_next_expiry: float = float("inf")
+_inner_talk_frequency = None
+_patch_installed: bool = False
+
+def _patched_talk_frequency(self, chat_stream_id: Optional[str] = None) -> float:
+    """补丁方法，对特定聊天流返回极低频率"""
+    if chat_stream_id in _silence_index:
+        if time.time() < _next_expiry or SilenceCore.is_silenced(chat_stream_id):
+            return 0.00000001  # 极低频率值
+    return _inner_talk_frequency(self, chat_stream_id)
+
+def _on_silence_changed(silence_index: Dict[str, Dict], next_expiry: float):
+    """
+    根据沉默集合动态安装/移除补丁
+    没有任何聊天流被沉默时ChatConfig.talk_frequency就是原方法，调用开销为零
+    - 只有补丁位于最外层时才移除，否则会连同外面的包装一起丢掉
+    - 补丁仍在调用链中时不再重新安装，避免把包着补丁的方法当作原方法而无限递归
+    """
+    global _silence_index, _next_expiry, _inner_talk_frequency, _patch_installed
+    _silence_index, _next_expiry = silence_index, next_expiry
+
+    current = ChatConfig.talk_frequency
+    if silence_index and not _patch_installed:
+        _inner_talk_frequency = current
+        ChatConfig.talk_frequency = _patched_talk_frequency
+        _patch_installed = True
+        logger.debug("沉默补丁已安装")
+    elif not silence_index and current is _patched_talk_frequency:
+        ChatConfig.talk_frequency = _inner_talk_frequency
+        _patch_installed = False
+        logger.debug("沉默补丁已移除")
+
 # 在ChatConfig类上设置属性来确保补丁只打一次
 def apply_silence_patch_once():
     """确保沉默补丁只应用一次"""
@@ -30,28 +77,28 @@ def apply_silence_patch_once():
     if hasattr(ChatConfig, "_silence_patch_applied") and ChatConfig._silence_patch_applied:
         return
     
-    # 保存原始方法
-    original_method = ChatConfig.talk_frequency
-    
-    # 创建补丁方法
-    def patched_method(self, chat_stream_id: Optional[str] = None) -> float:
-        """补丁方法，对特定聊天流返回极低频率"""
-        if chat_stream_id and SilenceCore.is_silenced(chat_stream_id):
-            return 0.00000001  # 极低频率值
-        return original_method(self, chat_stream_id)
-    
-    # 应用补丁
-    ChatConfig.talk_frequency = patched_method
+    # 沉默集合变化时按需安装或移除补丁
+    SilenceCore.add_change_listener(_on_silence_changed)
     ChatConfig._silence_patch_applied = True
     # logger.info("沉默补丁已应用")
 
+# config.toml的解析缓存，只有文件mtime变化时才重新解析，保证热重载的同时避免重复解析
+_config_cache: Optional[Dict[str, Any]] = None
+_config_mtime: Optional[int] = None
+
 def _load_config() -> Dict[str, Any]:
-        """从同级目录的config.toml文件直接加载配置"""
+        """从同级目录的config.toml文件加载配置（带缓存）"""
+        global _config_cache, _config_mtime
         try:
             # 获取当前文件所在目录
             script_dir = os.path.dirname(os.path.abspath(__file__))
             config_path = os.path.join(script_dir, "config.toml")
             
+            # 文件未变化时直接返回缓存
+            mtime = os.stat(config_path).st_mtime_ns
+            if _config_cache is not None and mtime == _config_mtime:
+                return _config_cache
+            
             # 读取并解析TOML配置文件
             with open(config_path, 'r', encoding='utf-8') as f:
                 config_data = toml.load(f)
@@ -59,28 +106,34 @@ def _load_config() -> Dict[str, Any]:
             # 构建配置字典，使用get方法安全访问嵌套值
             config = {
                 "permissions": {
-                    "admin_users": config_data.get("permissions", {}).get("admin_users", [])
+                    # 预先转换为frozenset，权限检查为O(1)
+                    "admin_users": frozenset(str(user) for user in config_data.get("permissions", {}).get("admin_users", []))
                 },
                 "adjustment": {
-                    "disable_command": config_data.get("adjustment", {}).get("disable_command", True)
+                    "disable_command": config_data.get("adjustment", {}).get("disable_command", True),
+                    "skip_planner": config_data.get("adjustment", {}).get("skip_planner", True),
+                    "deep_silence": config_data.get("adjustment", {}).get("deep_silence", False),
+                    "backlog_size": config_data.get("adjustment", {}).get("backlog_size", 20)
                 }
             }
+            _config_cache, _config_mtime = config, mtime
             return config
         except Exception as e:
             logger.error(f"加载配置文件时出错: {str(e)}\n{traceback.format_exc()}")
+            # 热重载时写坏了配置文件，继续沿用上一次成功加载的配置
+            if _config_cache is not None:
+                return _config_cache
             raise
 
 def _get_components_to_disable() -> tuple[List[str], List[str]]:
         """获取需要禁用的组件列表"""
         try:
-            # 获取启用的Action组件
-            enabled_actions = component_manage_api.get_enabled_components_info_by_type(ComponentType.ACTION)
-            # 获取启用的Command组件
-            enabled_commands = component_manage_api.get_enabled_components_info_by_type(ComponentType.COMMAND)
+            # 获取启用的Action和Command组件（缓存的注册表快照）
+            enabled_actions, enabled_commands = ComponentToggle.enabled_components()
             
             # 筛选出非silence相关的组件
-            actions_to_disable = [name for name in enabled_actions.keys() if name != "silence_stop_action"]
-            commands_to_disable = [name for name in enabled_commands.keys() if name != "silence_command"]
+            actions_to_disable = [name for name in enabled_actions if name != "silence_stop_action"]
+            commands_to_disable = [name for name in enabled_commands if name != "silence_command"]
 
             config =_load_config()
             disable_command = config.get("adjustment", {}).get("disable_command", True)
@@ -93,6 +146,60 @@ def _get_components_to_disable() -> tuple[List[str], List[str]]:
             logger.error(f"获取组件失败: {str(e)}\n{traceback.format_exc()}")
             return [], []
 
+def _should_short_circuit(stream_id: Optional[str]) -> bool:
+    """聊天流是否处于沉默中且需要跳过规划器/回复器（未沉默时只做一次字典查询）"""
+    if stream_id not in _silence_index:
+        return False
+    if not _load_config().get("adjustment", {}).get("skip_planner", True):
+        return False
+    return SilenceCore.is_silenced(stream_id)
+
+# 增量扫描消息时每批读取的条数
+MENTION_SCAN_BATCH = 100
+
+@lru_cache(maxsize=8)
+def _get_mention_pattern(self_id: str) -> re.Pattern:
+    """按机器人账号编译一次艾特匹配正则"""
+    return re.compile(rf'@<[^>]*:{re.escape(self_id)}>')
+
+def _is_mentioning_self(text: Optional[str]) -> bool:
+    """判断消息文本是否艾特了机器人自身"""
+    if not text:
+        return False
+    return _get_mention_pattern(str(global_config.bot.qq_account)).search(text) is not None
+
+def _resolve_target_streams(target: str, platform: str) -> Optional[Dict[str, Any]]:
+    """
+    解析批量指令的目标，返回 {聊天流ID: 聊天流对象}，格式不正确时返回None
+    - all: 所有群聊
+    - g:123,456: 指定群号的群聊
+    - re:<正则>: 群名匹配正则的群聊
+    """
+    group_ids, pattern = None, None
+    if target.startswith("g:"):
+        group_ids = {group_id for group_id in target[2:].split(",") if group_id}
+        if not group_ids:
+            return None
+    elif target.startswith("re:"):
+        try:
+            pattern = re.compile(target[3:])
+        except re.error:
+            return None
+    elif target != "all":
+        return None
+
+    streams = {}
+    for stream in chat_api.get_group_streams(platform):
+        group_info = stream.group_info
+        if group_info is None:
+            continue
+        if group_ids is not None and str(group_info.group_id) not in group_ids:
+            continue
+        if pattern is not None and not pattern.search(group_info.group_name or ""):
+            continue
+        streams[stream.stream_id] = stream
+    return streams
+
 @register_plugin
 class SilencePlugin(BasePlugin):
     """沉默插件"""
@@ -111,12 +218,15 @@ class SilencePlugin(BasePlugin):
         "permission": "命令组件的权限控制（支持热重载）",
         "adjustment": "功能微调（支持热重载，但仅在下一次沉默执行时生效）",
         "logging": "日志记录配置",
+        "storage": "沉默状态存储配置（修改后需重启麦麦）",
+        "reply": "沉默/解除沉默时的回复配置（修改后需重启麦麦）",
+        "metrics": "运行指标配置，指标可随时用'/silence stats'查看（修改后需重启麦麦）",
     }
 
     # 配置Schema定义
     config_schema = {
         "plugin": {
-            "config_version": ConfigField(type=str, default="0.9.6", description="插件配置文件版本号"),
+            "config_version": ConfigField(type=str, default="0.9.9", description="插件配置文件版本号"),
             "enabled": ConfigField(type=bool, default=True, description="是否启用插件"),
         },
         "components": {
@@ -129,12 +239,42 @@ class SilencePlugin(BasePlugin):
         },
         "adjustment": {
             "disable_command": ConfigField(type=bool, default=True, description="是否令沉默插件连命令也保持沉默，默认为开"),
+            "skip_planner": ConfigField(type=bool, default=True, description="沉默期间是否直接跳过规划器和回复器，不再为沉默中的群聊调用LLM，默认为开"),
+            "deep_silence": ConfigField(type=bool, default=False, description="深度沉默：沉默中的群聊只检查消息是否艾特了麦麦，其余消息不再进入记忆、关系、表情/图片识别等处理，也不会进入聊天记录，默认为关"),
+            "backlog_size": ConfigField(type=int, default=20, description="深度沉默期间每个群聊保留的被跳过消息条数，沉默结束时作为错过的上下文交给麦麦，设为0不保留"),
         },
         "logging": {
             "level": ConfigField(
                 type=str, default="INFO", description="日志级别", choices=["DEBUG", "INFO", "WARNING", "ERROR"]
             ),
             "prefix": ConfigField(type=str, default="[Silence]", description="日志前缀"),
+            "trace_enabled": ConfigField(type=bool, default=False, description="是否把每次沉默操作各阶段的耗时记录到追踪文件，用于排查缓慢的沉默/解除沉默（修改后需重启麦麦）"),
+            "trace_file": ConfigField(type=str, default="logs/silence_trace.jsonl", description="追踪文件路径（相对路径以插件目录为准），每行一条JSON记录"),
+            "trace_max_kb": ConfigField(type=int, default=1024, description="单个追踪文件的最大大小（KB），超过后轮转"),
+            "trace_backup_count": ConfigField(type=int, default=3, description="保留的已轮转追踪文件数量"),
+        },
+        "storage": {
+            "backend": ConfigField(
+                type=str, default="json", description="沉默状态的存储后端，json为默认的文件存储，sqlite适合大量群聊，sharded按群聊分桶存储、每次变更只重写所在的小文件，首次切换时会自动迁移已有数据", choices=["json", "sqlite", "sharded"]
+            ),
+            "durability": ConfigField(
+                type=str, default="delayed", description="写盘策略，delayed为先生效后在后台合并写盘，sync为写盘完成后才确认沉默/解除沉默", choices=["delayed", "sync"]
+            ),
+            "flush_delay_ms": ConfigField(type=int, default=200, description="delayed策略下合并写盘的时间窗口（毫秒）"),
+            "multi_process": ConfigField(type=bool, default=False, description="多个麦麦进程共用同一个插件目录时开启，写入时加文件锁并增量同步其他进程的修改（Windows不支持）"),
+        },
+        "reply": {
+            "timeout": ConfigField(type=float, default=10.0, description="等待LLM生成沉默回复的最长时间（秒），超时则直接发送默认回复"),
+            "pool_size": ConfigField(type=int, default=1, description="每种解除沉默回复预先生成的数量（所有群聊共用），设为0关闭预生成"),
+            "pool_ttl": ConfigField(type=int, default=1800, description="预生成回复的有效期（秒），过期的回复不会再被使用"),
+            "concurrency": ConfigField(type=int, default=4, description="同时生成并发送回复的数量上限，大量群聊同时沉默/解除沉默时生效"),
+            "rate": ConfigField(type=float, default=2.0, description="每秒最多开始生成的回复数，避免触发LLM或平台的频率限制，设为0不限速"),
+            "max_delay": ConfigField(type=int, default=300, description="回复排队超过该时间（秒）后不再发送，设为0不限制"),
+            "announce_expiry": ConfigField(type=bool, default=False, description="沉默时间到期时是否也发送解除沉默的回复"),
+        },
+        "metrics": {
+            "dump_file": ConfigField(type=str, default="", description="定期把运行指标导出为JSON的文件路径（相对路径以插件目录为准），留空则不导出"),
+            "dump_interval": ConfigField(type=int, default=60, description="导出运行指标的间隔（秒）"),
         },
     }
 
@@ -142,11 +282,46 @@ class SilencePlugin(BasePlugin):
         super().__init__(*args, **kwargs)
         # 初始化SilenceCore
         config_path = os.path.join(os.path.dirname(__file__), "silence_restrictions.json")
-        SilenceCore.init(config_path)
+        SilenceCore.init(
+            config_path,
+            backend=self.get_config("storage.backend", "json"),
+            durability=self.get_config("storage.durability", "delayed"),
+            flush_delay=self.get_config("storage.flush_delay_ms", 200) / 1000,
+            multi_process=self.get_config("storage.multi_process", False),
+        )
 
         # 应用猴子补丁（确保只打一次）
         logger_patch.apply_logger_color_patch_once()
         apply_silence_patch_once()
+        apply_planner_patch_once(_should_short_circuit)
+        ComponentToggle.install_registry_hook_once()
+        # 重启后重新应用持久化的沉默状态，并清理期间已经过期的条目
+        SilenceCore.reconcile()
+        # 加载定时沉默规则，停机期间开始的时段会立即补上
+        SilenceSchedules.init(_get_components_to_disable)
+        SilenceAnnouncer.configure(
+            timeout=self.get_config("reply.timeout", 10.0),
+            concurrency=self.get_config("reply.concurrency", 4),
+            rate=self.get_config("reply.rate", 2.0),
+            max_delay=self.get_config("reply.max_delay", 300),
+            announce_expiry=self.get_config("reply.announce_expiry", False),
+        )
+        ReplyPool.configure(
+            pool_size=self.get_config("reply.pool_size", 1),
+            ttl=self.get_config("reply.pool_ttl", 1800),
+        )
+        trace_file = self.get_config("logging.trace_file", "logs/silence_trace.jsonl")
+        SilenceTracer.configure(
+            enabled=self.get_config("logging.trace_enabled", False),
+            trace_file=os.path.join(os.path.dirname(__file__), trace_file),
+            max_bytes=self.get_config("logging.trace_max_kb", 1024) * 1024,
+            backup_count=self.get_config("logging.trace_backup_count", 3),
+        )
+        dump_file = self.get_config("metrics.dump_file", "")
+        SilenceMetrics.configure(
+            dump_file=os.path.join(os.path.dirname(__file__), dump_file) if dump_file else "",
+            dump_interval=self.get_config("metrics.dump_interval", 60),
+        )
 
     def get_plugin_components(self) -> List[Tuple[ComponentInfo, Type]]:
         """返回插件包含的组件列表"""
@@ -161,6 +336,11 @@ class SilencePlugin(BasePlugin):
         if self.get_config("components.enable_silence_command", True):
             components.append((SilenceCommand.get_command_info(), SilenceCommand))
 
+        components.append((SilenceMentionHandler.get_handler_info(), SilenceMentionHandler))
+        components.append((SilenceDeepSilenceHandler.get_handler_info(), SilenceDeepSilenceHandler))
+        components.append((SilenceStartupHandler.get_handler_info(), SilenceStartupHandler))
+        components.append((SilenceShutdownHandler.get_handler_info(), SilenceShutdownHandler))
+
         return components
 
 class SilenceAction(BaseAction):
@@ -251,64 +431,186 @@ class SilenceStopAction(BaseAction):
 
     async def execute(self) -> Tuple[bool, str]:
         # 获取当前聊天流ID
-        self_id = str(global_config.bot.qq_account)
         stream_id = self.chat_stream.stream_id
-        start_time = time.time()
-        mention_pattern = re.compile(rf'@<[^>]*:{re.escape(self_id)}>')
 
         logger.info("已进入沉默状态，开始等待...")
 
-        while True:
-            current_time = time.time()
-            elapsed_time = current_time - start_time
+        with SilenceTracer.span("stop_action", stream_id) as span:
+            if not SilenceCore.is_silenced(stream_id):
+                reason = "expired"
+            else:
+                with SilenceTracer.span("mention_scan"):
+                    mentioned = self._scan_new_mentions(stream_id)
+                if mentioned:
+                    reason = "mention"
+                else:
+                    # 由SilenceWatcher在艾特、到期或被移除时唤醒，等待期间不做任何轮询
+                    with SilenceTracer.span("wait"):
+                        reason = await SilenceWatcher.wait(stream_id)
+            span.set(reason=reason)
+
+        # 深度沉默期间跳过的消息，随动作记录一起进入上下文
+        backlog = SilenceBacklog.summarize(stream_id)
+        backlog = f"\n{backlog}" if backlog else ""
+
+        if reason == "mention":
+            # 移除沉默（这会自动处理组件恢复）
+            await SilenceCore.remove_silence(False, self.chat_stream, stream_id)
+            # 记录动作信息
+            await self.store_action_info(
+                action_build_into_prompt=True,
+                action_prompt_display=f"检测到艾特打断，已成功在聊天流{stream_id}解除沉默状态{backlog}",
+                action_done=True
+                )
+            return True, f"检测到艾特自身的消息，解除聊天流 {stream_id} 的沉默状态"
+
+        # 记录动作信息
+        await self.store_action_info(
+            action_build_into_prompt=True,
+            action_prompt_display=f"检测到时间已到，已成功在聊天流{stream_id}解除沉默状态{backlog}",
+            action_done=True
+            )
+        return True, f"检测到沉默状态已过期，解除聊天流 {stream_id} 的沉默状态"
+
+    def _scan_new_mentions(self, stream_id: str) -> bool:
+        """
+        补扫游标之后已入库的消息，检查是否有艾特自身的消息
+        - 按批次从早到晚读取，不设总数上限，每条消息只会被检查一次
+        - 没有游标时（例如重启后）从当前时刻开始，与事件监听互为补充
+        """
+        cursor = SilenceWatcher.get_cursor(stream_id)
+        end_time = time.time()
+        if cursor is None:
+            SilenceWatcher.advance_cursor(stream_id, end_time)
+            return False
 
-            # 检查新消息
-            recent_messages_dict = message_api.get_messages_by_time_in_chat(
+        while True:
+            messages = message_api.get_messages_by_time_in_chat(
                 chat_id=self.chat_id,
-                start_time=start_time,
-                limit=15,
-                end_time=current_time,
+                start_time=cursor,
+                end_time=end_time,
+                limit=MENTION_SCAN_BATCH,
+                limit_mode="earliest",
                 filter_mai=True,
                 filter_command=True,
             )
 
-            mentioned_message = [msg for msg in recent_messages_dict if msg.get("is_mentioned")]
-
-            for msg in mentioned_message:
-                processed_text = msg.get("processed_plain_text", "")
-                if processed_text and mention_pattern.search(processed_text):
-                    # 移除沉默（这会自动处理组件恢复）
-                    await SilenceCore.remove_silence(False, self.message.chat_stream, stream_id)
-                    # 记录动作信息
-                    await self.store_action_info(
-                        action_build_into_prompt=True,
-                        action_prompt_display=f"检测到艾特打断，已成功在聊天流{stream_id}解除沉默状态",
-                        action_done=True
-                        )
-                    return True, f"检测到艾特自身的消息，解除聊天流 {stream_id} 的沉默状态"
-                
-            if not SilenceCore.is_silenced(stream_id):
-                # 记录动作信息
-                await self.store_action_info(
-                    action_build_into_prompt=True,
-                    action_prompt_display=f"检测到时间已到，已成功在聊天流{stream_id}解除沉默状态",
-                    action_done=True
-                    )
-                return True, f"检测到沉默状态已过期，解除聊天流 {stream_id} 的沉默状态"
-
-            # 每60秒输出一次等待状态
-            if int(elapsed_time) > 0 and int(elapsed_time) % 60 == 0:
-                logger.debug(
-                    f"{self.log_prefix}已沉默{elapsed_time:.0f}秒，继续保持沉默..."
-                )
-            await asyncio.sleep(1)
+            for msg in messages:
+                cursor = max(cursor, msg.get("time", cursor))
+                if msg.get("is_mentioned") and _is_mentioning_self(msg.get("processed_plain_text", "")):
+                    SilenceWatcher.advance_cursor(stream_id, cursor)
+                    return True
+
+            SilenceWatcher.advance_cursor(stream_id, cursor)
+            if len(messages) < MENTION_SCAN_BATCH:
+                return False
+
+class SilenceMentionHandler(BaseEventHandler):
+    """监听新消息，沉默中的聊天流收到艾特时通知SilenceWatcher"""
+
+    event_type = EventType.ON_MESSAGE
+    handler_name = "silence_mention_handler"
+    handler_description = "沉默期间检测艾特并唤醒对应聊天流的SilenceStopAction"
+    weight = 0
+    intercept_message = False
+
+    async def execute(self, message: Optional[MaiMessages]) -> Tuple[bool, bool, Optional[str]]:
+        if not message or not message.stream_id:
+            return True, True, None
+        SilenceMetrics.ensure_dumper()
+
+        # 未沉默的聊天流直接放行，只做一次内存查询
+        if not SilenceCore.is_silenced(message.stream_id):
+            return True, True, None
+
+        if _is_mentioning_self(message.plain_text):
+            SilenceMetrics.incr("mention.notified")
+            SilenceWatcher.notify_mention(message.stream_id)
+
+        return True, True, None
+
+class SilenceDeepSilenceHandler(BaseEventHandler):
+    """
+    深度沉默：在宿主处理消息之前拦截沉默中的聊天流的消息
+    - 只保留检测艾特所需的最少处理，艾特自身的消息照常放行并唤醒SilenceStopAction
+    - 其余消息不再进入记忆、关系、表情/图片识别等后续处理，只在有界的记录中留下发送者与文本
+    - 未开启或聊天流未沉默时只做一次内存查询
+    """
+
+    event_type = EventType.ON_MESSAGE
+    handler_name = "silence_deep_silence_handler"
+    handler_description = "深度沉默期间拦截沉默中的聊天流的消息，只检测艾特"
+    # 先于其他ON_MESSAGE处理器执行
+    weight = 100
+    intercept_message = True
+
+    async def execute(self, message: Optional[MaiMessages]) -> Tuple[bool, bool, Optional[str]]:
+        if not message or not message.stream_id or message.stream_id not in _silence_index:
+            return True, True, None
+
+        adjustment = _load_config().get("adjustment", {})
+        if not adjustment.get("deep_silence", False) or not SilenceCore.is_silenced(message.stream_id):
+            return True, True, None
+
+        text = message.plain_text or ""
+        # 艾特与沉默指令照常放行
+        if _is_mentioning_self(text) or text.lstrip().startswith("/silence"):
+            return True, True, None
+
+        base_info = message.message_base_info or {}
+        sender = str(base_info.get("user_nickname") or base_info.get("user_id") or "")
+        SilenceBacklog.record(message.stream_id, sender, text, adjustment.get("backlog_size", 20))
+        SilenceMetrics.incr("deep_silence.intercepted")
+        return True, False, None
+
+class SilenceStartupHandler(BaseEventHandler):
+    """麦麦启动完成后确保到期调度器在运行，插件加载时可能还没有事件循环"""
+
+    event_type = EventType.ON_START
+    handler_name = "silence_startup_handler"
+    handler_description = "启动后为恢复的沉默状态启动到期调度器"
+    weight = 0
+    intercept_message = False
+
+    async def execute(self, message: Optional[MaiMessages]) -> Tuple[bool, bool, Optional[str]]:
+        SilenceCore.start_expiry_scheduler()
+        SilenceSchedules.start()
+        SilenceMetrics.ensure_dumper()
+        return True, True, None
+
+class SilenceShutdownHandler(BaseEventHandler):
+    """麦麦关闭时把尚未写盘的沉默状态刷写到存储"""
+
+    event_type = EventType.ON_STOP
+    handler_name = "silence_shutdown_handler"
+    handler_description = "关闭前刷写沉默状态"
+    weight = 0
+    intercept_message = False
+
+    async def execute(self, message: Optional[MaiMessages]) -> Tuple[bool, bool, Optional[str]]:
+        SilenceCore.flush()
+        SilenceMetrics.dump()
+        SilenceTracer.shutdown()
+        return True, True, None
 
 class SilenceCommand(BaseCommand):
     command_name = "silence_command"
     command_description = "沉默插件"
-    command_pattern = r"^/silence\s+(?P<action>\w+)(?:\s+(?P<duration>\d+))?\s*$"
-    command_help = "使用'/silence true [持续时间]'执行沉默，'/silence false'结束沉默"
-    command_examples = ["/silence true [times]", "/silence false"]
+    command_pattern = (
+        r"^/silence\s+(?P<action>\w+)(?:\s+(?P<duration>\d+))?"
+        r"(?:\s+(?P<window>\d{1,2}:\d{2}-\d{1,2}:\d{2})(?:\s+(?P<days>daily|weekdays|weekends|[1-7](?:,[1-7])*))?)?"
+        r"(?:\s+(?P<target>all|g:[\d,]+|re:.+?))?\s*$"
+    )
+    command_help = (
+        "使用'/silence true [持续时间]'执行沉默，'/silence false'结束沉默，'/silence stats'查看运行指标；"
+        "'/silence schedule 开始-结束 [星期]'设置每天重复的定时沉默，'/silence unschedule'删除；"
+        "在末尾加上目标可批量操作：all=所有群聊，g:群号1,群号2=指定群聊，re:正则=群名匹配的群聊"
+    )
+    command_examples = [
+        "/silence true [times]", "/silence false", "/silence stats",
+        "/silence true 3600 all", "/silence false g:123456,654321", "/silence true re:测试",
+        "/silence schedule 00:00-08:00", "/silence schedule 09:00-18:00 weekdays", "/silence unschedule",
+    ]
 
     async def execute(self) -> Tuple[bool, Optional[str], bool]:
         sender = self.message.message_info.user_info
@@ -326,11 +628,22 @@ class SilenceCommand(BaseCommand):
                         await self.send_text(reply_content)
             return False, "权限不足，无权使用此命令", True
         
+        action = self.matched_groups.get("action", "")
+        
+        # 查看运行指标不涉及沉默状态，私聊中也可以使用
+        if action == "stats":
+            await self.send_text(SilenceMetrics.format_report())
+            return True, "已发送沉默插件运行指标", True
+        
+        # 带目标的批量操作可以在任意聊天中发出
+        target = self.matched_groups.get("target")
+        if target:
+            return await self._execute_bulk(action, self.matched_groups.get("duration"), target)
+        
         if not self.message.message_info.group_info:
             logger.info("你为什么要在私聊环境使用沉默插件的指令？")
             return False, "该命令不应该用于私聊环境", True
         
-        action = self.matched_groups.get("action", "")
         duration = self.matched_groups.get("duration")
         stream_id = self.message.chat_stream.stream_id
         
@@ -356,12 +669,64 @@ class SilenceCommand(BaseCommand):
                 return True, f"已从沉默列表移除聊天流 {stream_id}", True
             else:
                 return True, f"从沉默列表移除聊天流 {stream_id} 失败", True
+        
+        elif action in ("schedule", "unschedule"):
+            return await self._execute_schedule(action, [stream_id])
+    
+    async def _execute_bulk(self, action: str, duration: Optional[str], target: str) -> Tuple[bool, Optional[str], bool]:
+        """对多个群聊批量执行沉默/解除沉默，结果汇总发送给指令发出者"""
+        streams = _resolve_target_streams(target, self.message.message_info.platform)
+        if streams is None:
+            await self.send_text(f"无法识别的目标: {target}")
+            return False, f"无法识别的批量指令目标 {target}", True
+        
+        if action in ("schedule", "unschedule"):
+            return await self._execute_schedule(action, list(streams))
+        
+        if action == "true":
+            disabled_actions, disabled_commands = _get_components_to_disable()
+            duration_val = float(duration) if duration else None
+            changed = await SilenceCore.add_silence_many(True, streams, duration_val, disabled_actions, disabled_commands)
+            summary = f"已让 {len(changed)} 个群聊进入沉默（匹配 {len(streams)} 个）"
+        elif action == "false":
+            if target == "all":
+                # 已不在聊天流管理器中的聊天流也一并解除
+                for stream_id in SilenceCore.get_all_silenced_streams():
+                    streams.setdefault(stream_id, None)
+            changed = await SilenceCore.remove_silence_many(True, streams)
+            summary = f"已为 {len(changed)} 个群聊解除沉默（匹配 {len(streams)} 个）"
+        else:
+            return False, f"批量指令不支持 {action}", True
+        
+        await self.send_text(summary)
+        return True, summary, True
+    
+    async def _execute_schedule(self, action: str, stream_ids: List[str]) -> Tuple[bool, Optional[str], bool]:
+        """设置/查看/删除定时沉默规则，结果发送给指令发出者"""
+        window = self.matched_groups.get("window")
+        if action == "unschedule":
+            removed = SilenceSchedules.remove_many(stream_ids)
+            summary = f"已删除 {len(removed)} 个群聊的定时沉默，正在进行的时段照常到期"
+        elif not window:
+            rule = SilenceSchedules.get(stream_ids[0]) if len(stream_ids) == 1 else None
+            summary = f"当前的定时沉默: {describe_schedule(rule)}" if rule else "当前没有定时沉默"
+        else:
+            try:
+                rule = parse_schedule(window, self.matched_groups.get("days"))
+            except ValueError as e:
+                await self.send_text(f"无法设置定时沉默: {str(e)}")
+                return False, f"无效的定时沉默 {window}", True
+            SilenceSchedules.set_many(stream_ids, rule)
+            summary = f"已为 {len(stream_ids)} 个群聊设置定时沉默: {describe_schedule(rule)}"
+        
+        await self.send_text(summary)
+        return True, summary, True
     
     def _check_person_permission(self, user_id: str) -> bool:
         """权限检查逻辑"""
         config = _load_config()
-        admin_users = config.get("permissions", {}).get("admin_users", [])
+        admin_users = config.get("permissions", {}).get("admin_users", frozenset())
         if not admin_users:
             logger.warning(f"未配置管理员用户列表")
             return False
-        return user_id in admin_users
+        return str(user_id) in admin_users
@@ -0,0 +1,83 @@
+import os
+from contextlib import contextmanager
+from typing import Optional
+from src.common.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:
+    # Windows没有fcntl，多进程模式不可用
+    fcntl = None
+
+logger = get_logger("Silence")
+
+# 代数计数器在锁文件开头，固定宽度，覆盖写入时不需要截断
+_GENERATION_WIDTH = 20
+
+class ProcessLock:
+    """
+    多个进程共享同一份沉默状态时使用的文件锁
+    - 基于fcntl.flock的建议锁：写入存储时持有排他锁，读取时持有共享锁
+    - 锁文件开头保存一个代数计数器，每次写入后加一；
+      其他进程只需读取这20个字节就能知道状态是否变化，不需要stat存储文件
+    """
+
+    def __init__(self, lock_file: str):
+        self.lock_file = lock_file
+        os.makedirs(os.path.dirname(lock_file) or ".", exist_ok=True)
+        self._fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+
+    @staticmethod
+    def supported() -> bool:
+        return fcntl is not None
+
+    def acquire(self, shared: bool = False, blocking: bool = True) -> bool:
+        """获取锁，blocking=False且锁被占用时返回False"""
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._fd, operation)
+        except BlockingIOError:
+            return False
+        return True
+
+    def release(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def hold(self, shared: bool = False):
+        self.acquire(shared)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def generation(self) -> int:
+        """当前代数，读取失败或文件为空时为0"""
+        try:
+            return int(os.pread(self._fd, _GENERATION_WIDTH, 0) or b"0")
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self) -> int:
+        """代数加一，调用方需持有排他锁"""
+        generation = self.generation() + 1
+        os.pwrite(self._fd, f"{generation:0{_GENERATION_WIDTH}d}".encode("ascii"), 0)
+        return generation
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+def create_process_lock(lock_file: str) -> Optional[ProcessLock]:
+    """创建进程间文件锁，当前平台不支持时返回None（退回单进程模式）"""
+    if not ProcessLock.supported():
+        logger.warning("当前平台不支持fcntl文件锁，多进程模式未开启")
+        return None
+    try:
+        return ProcessLock(lock_file)
+    except OSError as e:
+        logger.error(f"无法创建锁文件 {lock_file}，多进程模式未开启: {str(e)}")
+        return None
@@ -0,0 +1,253 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from src.common.logger import get_logger
+from plugins.silence_plugin.silence_core import SilenceCore
+from plugins.silence_plugin.metrics import SilenceMetrics
+from plugins.silence_plugin.deadline_loop import run_deadline_loop
+
+logger = get_logger("Silence")
+
+# 星期的别名，0为周一
+_DAY_ALIASES = {
+    "daily": (0, 1, 2, 3, 4, 5, 6),
+    "weekdays": (0, 1, 2, 3, 4),
+    "weekends": (5, 6),
+}
+_DAY_NAMES = "一二三四五六日"
+
+def _parse_minutes(text: str) -> int:
+    hour, minute = text.strip().split(":")
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or hour * 60 + minute > 24 * 60:
+        raise ValueError(f"无效的时间: {text}")
+    return hour * 60 + minute
+
+def parse_schedule(window: str, days: Optional[str] = None) -> Dict:
+    """
+    解析沉默时段，返回可持久化的规则 {"start": 分钟, "end": 分钟, "days": [星期]}
+    - window: "HH:MM-HH:MM"，结束早于开始时表示跨过午夜（星期按开始的那天计算）
+    - days: daily（默认）、weekdays、weekends，或逗号分隔的1-7（1为周一）
+    """
+    try:
+        start_text, end_text = window.split("-")
+    except ValueError:
+        raise ValueError(f"无效的时段: {window}")
+    start, end = _parse_minutes(start_text), _parse_minutes(end_text)
+    if start % (24 * 60) == end % (24 * 60):
+        raise ValueError("开始与结束时间不能相同")
+
+    if not days or days in _DAY_ALIASES:
+        day_list = list(_DAY_ALIASES[days or "daily"])
+    else:
+        try:
+            day_list = sorted({int(day) - 1 for day in days.split(",")})
+        except ValueError:
+            raise ValueError(f"无效的星期: {days}")
+        if not day_list or day_list[0] < 0 or day_list[-1] > 6:
+            raise ValueError(f"无效的星期: {days}")
+    return {"start": start, "end": end, "days": day_list}
+
+def describe_schedule(rule: Dict) -> str:
+    """规则的可读描述，例如 "00:00-08:00 每周一、二、三、四、五" """
+    window = f"{rule['start'] // 60:02d}:{rule['start'] % 60:02d}-{rule['end'] // 60:02d}:{rule['end'] % 60:02d}"
+    if len(rule["days"]) == 7:
+        return f"{window} 每天"
+    return f"{window} 每周" + "、".join(_DAY_NAMES[day] for day in rule["days"])
+
+def _same_window(rule: Dict, other: Dict) -> bool:
+    return all(rule.get(key) == other.get(key) for key in ("start", "end", "days"))
+
+def window_at(rule: Dict, now: float) -> Tuple[float, float]:
+    """now所在的、或now之后最近的一个沉默时段 (开始, 结束)，按本地时间计算"""
+    today = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    crosses_midnight = rule["end"] <= rule["start"]
+    # 从昨天开始找，跨午夜的时段可能始于昨天
+    for offset in range(-1, 8):
+        day = today + timedelta(days=offset)
+        if day.weekday() not in rule["days"]:
+            continue
+        start = day + timedelta(minutes=rule["start"])
+        end = day + timedelta(days=1 if crosses_midnight else 0, minutes=rule["end"])
+        if end.timestamp() > now:
+            return start.timestamp(), end.timestamp()
+    raise ValueError("规则中没有任何星期")
+
+class SilenceSchedules:
+    """
+    按时段重复的沉默（例如每晚00:00-08:00、工作日工作时间）
+    - 规则与沉默状态存在同一个存储中，每条规则记录最近一次已应用的时段开始时间
+    - 每个聊天流只预先算出下一次开始的时间放入最小堆，由一个后台任务在到点时添加沉默；
+      is_silenced不需要计算规则，仍然只是一次时间比较
+    - 时段开始时以"到时段结束"为时长走普通的添加沉默流程，结束由到期调度器负责，
+      组件开关、到期与回复全部复用现有逻辑
+    - 时段内被艾特或指令解除后不会再次进入沉默，直到下一个时段
+    - 多进程模式下其他进程修改规则后同步到本进程；时段开始前重新读取规则，
+      已应用的时段只写入存储中仍是同一时段的规则，不会用本进程过时的规则覆盖其他进程的修改
+    """
+
+    # 聊天流ID -> 规则 {"start", "end", "days", "applied"}
+    _rules: Dict[str, Dict] = {}
+    # (下一次开始时间, 聊天流ID)，规则被修改后旧条目按_next_start判断为过时
+    _heap: List[Tuple[float, str]] = []
+    _next_start: Dict[str, float] = {}
+    _task: Optional[asyncio.Task] = None
+    _wakeup: Optional[asyncio.Event] = None
+    # 开始沉默时需要禁用的组件，由插件提供
+    _components: Callable[[], Tuple[List[str], List[str]]] = lambda: ([], [])
+
+    @classmethod
+    def init(cls, components: Callable[[], Tuple[List[str], List[str]]]):
+        """读取已保存的规则并算出各自的下一次开始时间"""
+        cls._components = components
+        cls._rules = SilenceCore.load_schedules()
+        cls._heap, cls._next_start = [], {}
+        for stream_id in cls._rules:
+            cls._plan(stream_id, time.time())
+        SilenceMetrics.register_gauge("schedules", lambda: len(cls._rules))
+        SilenceCore.set_schedule_listener(cls._sync)
+        if cls._rules:
+            logger.info(f"已加载 {len(cls._rules)} 条定时沉默规则")
+        cls.start()
+
+    @classmethod
+    def get(cls, stream_id: str) -> Optional[Dict]:
+        return cls._rules.get(stream_id)
+
+    @classmethod
+    def set_many(cls, stream_ids: List[str], rule: Dict):
+        """为一批聊天流设置同一条规则，只写一次存储"""
+        now = time.time()
+        changes = {}
+        for stream_id in stream_ids:
+            # 新规则从下一个时段开始生效，当前正处于的时段也会立即进入沉默
+            cls._rules[stream_id] = changes[stream_id] = {**rule, "applied": None}
+            cls._plan(stream_id, now)
+        SilenceCore.save_schedules(changes)
+        cls.start()
+
+    @classmethod
+    def remove_many(cls, stream_ids: List[str]) -> List[str]:
+        """
+        删除一批聊天流的规则，返回实际删除的聊天流ID
+        当前正在进行的时段不受影响，照常到期
+        """
+        removed = [stream_id for stream_id in stream_ids if cls._rules.pop(stream_id, None) is not None]
+        for stream_id in removed:
+            cls._next_start.pop(stream_id, None)
+        if removed:
+            SilenceCore.save_schedules({stream_id: None for stream_id in removed})
+        return removed
+
+    @classmethod
+    def _sync(cls, stored: Dict[str, Dict]):
+        """以存储中的规则为准（多进程模式下由其他进程修改），只重新安排发生变化的聊天流"""
+        for stream_id in [stream_id for stream_id in cls._rules if stream_id not in stored]:
+            del cls._rules[stream_id]
+            cls._next_start.pop(stream_id, None)
+        now = time.time()
+        for stream_id, rule in stored.items():
+            if cls._rules.get(stream_id) != rule:
+                cls._rules[stream_id] = rule
+                cls._plan(stream_id, now)
+        cls.start()
+
+    @classmethod
+    def _plan(cls, stream_id: str, now: float):
+        """算出该聊天流下一次需要开始沉默的时间并放入堆，O(log n)"""
+        rule = cls._rules[stream_id]
+        start, end = window_at(rule, now)
+        if start <= now and rule.get("applied") == start:
+            # 当前时段已经应用过（包括被手动解除的情况），等下一个时段
+            start, end = window_at(rule, end)
+        next_start = max(start, now)
+        cls._next_start[stream_id] = next_start
+        heapq.heappush(cls._heap, (next_start, stream_id))
+        if cls._wakeup and cls._heap[0] == (next_start, stream_id):
+            cls._wakeup.set()
+
+    @classmethod
+    def start(cls):
+        """在当前事件循环中启动调度任务（没有运行中的事件循环时由启动事件补上）"""
+        if not cls._heap or (cls._task is not None and not cls._task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        cls._wakeup = asyncio.Event()
+        cls._task = loop.create_task(cls._loop())
+
+    @classmethod
+    async def _loop(cls):
+        """睡到最近的开始时间，到点的聊天流进入沉默后算出各自的下一次开始时间"""
+        await run_deadline_loop("定时沉默调度器", cls._wakeup, cls._begin_due,
+                                lambda: cls._heap[0][0] if cls._heap else None)
+
+    @classmethod
+    async def _begin_due(cls, now: float):
+        due = []
+        while cls._heap and cls._heap[0][0] <= now:
+            next_start, stream_id = heapq.heappop(cls._heap)
+            # 规则被修改或删除后，堆中旧的开始时间已经过时
+            if cls._next_start.get(stream_id) == next_start:
+                due.append(stream_id)
+        if due:
+            await cls._begin_many(due, now)
+
+    @classmethod
+    async def _begin_many(cls, stream_ids: List[str], now: float):
+        """
+        让一批到点的聊天流进入沉默并算出各自的下一次开始时间
+        - 同一个时段的聊天流一次批量添加沉默，所有已应用的时段合并为一次规则写入
+        - 等待添加沉默期间规则可能被删除或修改，只记录仍是原规则的聊天流；
+          被修改的规则已由set_many重新安排，被删除的不再安排
+        - 单个时段出错不影响其他时段
+        """
+        stored = SilenceCore.reload_schedules()
+        if stored is not None:
+            cls._sync(stored)
+        rules = {stream_id: cls._rules.get(stream_id) for stream_id in stream_ids}
+        windows: Dict[Tuple[float, float], List[str]] = {}
+        for stream_id, rule in rules.items():
+            if rule is None:
+                continue
+            start, end = window_at(rule, now)
+            if start <= now and rule.get("applied") != start:
+                windows.setdefault((start, end), []).append(stream_id)
+
+        changes = {}
+        disabled_actions, disabled_commands = cls._components() if windows else ([], [])
+        for (start, end), window_stream_ids in windows.items():
+            try:
+                # 已经在沉默中（例如手动的永久沉默）时不覆盖，只记为已应用
+                await SilenceCore.add_silence_many(
+                    True, {stream_id: None for stream_id in window_stream_ids}, max(end - time.time(), 1.0),
+                    disabled_actions, disabled_commands, source="schedule", announce=False,
+                )
+            except Exception as e:
+                logger.error(f"为 {len(window_stream_ids)} 个聊天流开始定时沉默时出错: {str(e)}")
+                continue
+            for stream_id in window_stream_ids:
+                rule = rules[stream_id]
+                if cls._rules.get(stream_id) is rule:
+                    rule["applied"] = start
+                    changes[stream_id] = rule
+        if changes:
+            SilenceCore.update_schedules(lambda stored: {
+                stream_id: rule for stream_id, rule in changes.items()
+                if stream_id in stored and _same_window(stored[stream_id], rule)
+            })
+            SilenceMetrics.incr("schedule.started", len(changes))
+            logger.info(f"{len(changes)} 个聊天流进入定时沉默时段")
+
+        now = time.time()
+        for stream_id, rule in rules.items():
+            if rule is None or cls._rules.get(stream_id) is not rule:
+                continue
+            try:
+                cls._plan(stream_id, now)
+            except Exception as e:
+                logger.error(f"安排聊天流 {stream_id} 的下一次定时沉默时出错: {str(e)}")
@@ -1,57 +1,575 @@
-import json
+import asyncio
+import atexit
+import heapq
 import os
+import threading
 import time
-from typing import Dict, List, Optional
-from src.plugin_system.apis import component_manage_api
-from src.plugin_system.base.component_types import ComponentType
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from src.common.logger import get_logger
-from src.plugin_system.apis import generator_api, send_api
+from plugins.silence_plugin.silence_watcher import SilenceWatcher
+from plugins.silence_plugin.backlog import SilenceBacklog
+from plugins.silence_plugin.component_toggle import ComponentToggle
+from plugins.silence_plugin.component_sets import ComponentSets
+from plugins.silence_plugin.announcer import SilenceAnnouncer
+from plugins.silence_plugin.metrics import SilenceMetrics
+from plugins.silence_plugin.tracing import SilenceTracer
+from plugins.silence_plugin.storage import StorageBackend, create_storage
+from plugins.silence_plugin.process_lock import ProcessLock, create_process_lock
+from plugins.silence_plugin.deadline_loop import run_deadline_loop
 
 logger = get_logger("Silence")
 
 class SilenceCore:
     """沉默功能的核心实现"""
     
-    _config_file: str = ""
+    _storage: Optional[StorageBackend] = None
+    # 内存中的沉默状态索引（权威数据），避免每次查询都读盘
+    _data: Dict[str, Dict] = {}
+    # 上一次读写时存储文件的签名（多进程模式下为代数），用于发现进程外的修改
+    _storage_signature: Any = None
+    # 多进程模式下的文件锁，None表示单进程模式
+    _process_lock: Optional[ProcessLock] = None
+    # 已从存储读出、尚未应用到内存索引的其他进程的修改（可能在刷写线程中读出）
+    _external_lock = threading.Lock()
+    _external_changes: Dict[str, Optional[Dict]] = {}
+    _external_reload: Optional[Dict[str, Dict]] = None
+    _external_sets: Dict[str, Dict] = {}
+    # 多进程模式下其他进程修改后存储中的全部定时沉默规则，None表示没有变化
+    _external_schedules: Optional[Dict[str, Dict]] = None
+    # 其他进程修改定时沉默规则后的回调: callback(存储中的全部规则)
+    _schedule_listener: Optional[Callable[[Dict[str, Dict]], None]] = None
+    _last_check: float = 0.0
+    # 两次检查文件变更之间的最小间隔（秒）
+    _check_interval: float = 1.0
+    # 到期调度器：以 expiration 为键的最小堆，所有聊天流共用一个后台任务
+    _expiry_heap: List[Tuple[float, str]] = []
+    _expiry_task: Optional[asyncio.Task] = None
+    _expiry_wakeup: Optional[asyncio.Event] = None
+    # 写回（write-behind）刷写器：尚未写盘的变更，None表示删除
+    _pending: Dict[str, Optional[Dict]] = {}
+    _flush_task: Optional[asyncio.Task] = None
+    _flush_delay: float = 0.2
+    _durability: str = "delayed"
+    # 串行化对存储后端的访问（刷写在线程池中进行）
+    _storage_lock = threading.Lock()
+    _atexit_registered: bool = False
+    # 每个聊天流的锁及其使用者计数，以及正在进行的 (stream_id, 转换类型) 操作
+    _stream_locks: Dict[str, asyncio.Lock] = {}
+    _lock_users: Dict[str, int] = {}
+    _inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+    # 排队等待进行中操作结束的到期清理任务，保持引用避免任务在运行前被回收
+    _expire_tasks: Set[asyncio.Task] = set()
+    # 沉默集合变化时的回调: callback(沉默索引, 最早到期时间)
+    _change_listeners: List[Callable[[Dict[str, Dict], float], None]] = []
     
     @classmethod
-    def init(cls, config_file: str):
-        """初始化，设置配置文件路径并确保文件存在"""
-        cls._config_file = config_file
-        cls._ensure_config_file()
-    
-    @classmethod
-    def _ensure_config_file(cls):
-        """确保配置文件存在，如果不存在则创建"""
+    def init(cls, config_file: str, backend: str = "json", durability: str = "delayed", flush_delay: float = 0.2,
+             multi_process: bool = False):
+        """
+        初始化，根据配置创建存储后端并确保其可用
+        - durability="delayed": 变更先写入内存，flush_delay秒内合并写盘
+        - durability="sync": add_silence/remove_silence 返回前等待写盘完成，写盘失败时抛出OSError
+        - multi_process=True: 多个进程共用同一份存储，写入时持有文件锁，并增量同步其他进程的修改
+        """
+        cls._storage = create_storage(backend, config_file)
+        cls._durability = durability
+        cls._flush_delay = flush_delay
+        if cls._process_lock is not None:
+            cls._process_lock.close()
+        cls._process_lock = create_process_lock(os.path.splitext(config_file)[0] + ".lock") if multi_process else None
         try:
-            os.makedirs(os.path.dirname(cls._config_file), exist_ok=True)
-            if not os.path.exists(cls._config_file):
-                with open(cls._config_file, 'w', encoding='utf-8') as f:
-                    json.dump({}, f, ensure_ascii=False, indent=2)
-                logger.info(f"已创建沉默配置文件: {cls._config_file}")
+            cls._storage.ensure()
         except Exception as e:
             logger.error(f"创建配置文件失败: {str(e)}")
             raise
+        cls._refresh_if_changed(force=True)
+        cls._flush_pending()
+        
+        if not cls._atexit_registered:
+            atexit.register(cls.flush)
+            cls._atexit_registered = True
+        
+        SilenceMetrics.register_gauge("silenced_streams", lambda: len(cls._data))
+        SilenceMetrics.register_gauge("pending_writes", lambda: len(cls._pending))
+        SilenceMetrics.register_gauge("expiry_heap_size", lambda: len(cls._expiry_heap))
+        SilenceMetrics.register_gauge("component_sets", ComponentSets.count)
+        SilenceMetrics.register_gauge("stop_action_waiters", SilenceWatcher.waiter_count)
+        SilenceMetrics.register_gauge("backlog_messages", SilenceBacklog.size)
+        SilenceMetrics.register_gauge("announce_queue", SilenceAnnouncer.queue_size)
+        # 回复队列据此丢弃聊天流状态已经改变的回复
+        SilenceAnnouncer.set_state_checker(cls.is_silenced)
     
     @classmethod
-    def _load_data(cls) -> Dict[str, Dict]:
-        """从JSON文件加载所有数据"""
+    def reconcile(cls) -> Tuple[int, int]:
+        """
+        启动时让运行时状态与持久化的沉默状态一致，返回 (仍在沉默的数量, 清理的过期数量)
+        - 重启后宿主内存中的局部禁用已经丢失，一次遍历为所有仍在沉默的聊天流重新禁用组件
+        - 已过期的条目不需要恢复组件，直接从索引中移除并合并为一次写入
+        - 清理不再被任何沉默状态引用的组件集合（仅单进程模式）
+        - 重建到期堆并启动到期调度器（没有运行中的事件循环时由启动事件补上）
+        整个过程只遍历内存索引一次，不逐条写盘、不逐条输出日志
+        """
+        with SilenceMetrics.timer("startup.reconcile"), SilenceTracer.span("reconcile") as span:
+            now = time.time()
+            expired = [
+                stream_id for stream_id, stream_data in cls._data.items()
+                if stream_data.get("expiration") is not None and stream_data["expiration"] <= now
+            ]
+            for stream_id in expired:
+                del cls._data[stream_id]
+                cls._pending[stream_id] = None
+            # 多进程模式下其他进程可能缓存着当前未被引用的集合，之后intern时不会重新写入，
+            # 删除后它们新写入的记录会引用一个不存在的集合；不同集合的数量很少，共享的集合表不做清理
+            pruned = 0
+            if cls._process_lock is None:
+                pruned = ComponentSets.prune(stream_data.get("components") for stream_data in cls._data.values())
+            if expired or pruned:
+                cls._flush_pending()
+            
+            failed = 0
+            for stream_id, stream_data in cls._data.items():
+                try:
+                    ComponentToggle.disable(stream_id, *ComponentSets.resolve(stream_data))
+                except Exception as e:
+                    failed += 1
+                    logger.debug(f"恢复聊天流 {stream_id} 的组件禁用失败: {str(e)}")
+            
+            cls._rebuild_expiry_heap()
+            span.set(active=len(cls._data), expired=len(expired), failed=failed, pruned_sets=pruned)
+        
+        if failed:
+            logger.warning(f"启动时有 {failed} 个聊天流的组件禁用未能恢复")
+        if cls._data or expired:
+            logger.info(f"已恢复 {len(cls._data)} 个沉默中的聊天流，清理了 {len(expired)} 个已过期的沉默状态")
+        return len(cls._data), len(expired)
+    
+    @classmethod
+    def _signature(cls) -> Any:
+        """多进程模式下读取锁文件中的代数，否则使用存储后端自己的签名"""
+        if cls._process_lock is not None:
+            return cls._process_lock.generation()
+        return cls._storage.signature()
+    
+    @classmethod
+    def _exclusive(cls):
+        """多进程模式下写入存储时持有的排他文件锁"""
+        return cls._process_lock.hold() if cls._process_lock is not None else nullcontext()
+    
+    @classmethod
+    def _refresh_if_changed(cls, force: bool = False):
+        """
+        按需刷新内存索引
+        - 距上次检查不足 _check_interval 时直接返回，不产生任何I/O
+        - 仅当签名变化（被进程外修改）时才读取，能增量读取时只读取变化的部分
+        """
+        now = time.monotonic()
+        if not force and now - cls._last_check < cls._check_interval:
+            return
+        cls._last_check = now
+        
+        # 后台正在写盘（或其他进程持有排他锁）时不阻塞事件循环，留到下一次检查
+        if not cls._storage_lock.acquire(blocking=force):
+            return
+        try:
+            if cls._process_lock is not None and not cls._process_lock.acquire(shared=True, blocking=force):
+                return
+            try:
+                if not force:
+                    cls._collect_external_locked()
+                else:
+                    SilenceMetrics.incr("storage.reload")
+                    cls._storage_signature = cls._signature()
+                    with SilenceMetrics.timer("storage.load"), SilenceTracer.span("load_data"):
+                        data = cls._read_storage()
+            finally:
+                if cls._process_lock is not None:
+                    cls._process_lock.release()
+        finally:
+            cls._storage_lock.release()
+        
+        if not force:
+            cls._apply_external()
+            return
+        
+        with cls._external_lock:
+            cls._external_changes, cls._external_reload, cls._external_sets = {}, None, {}
+            cls._external_schedules = None
+        
+        # 旧版本写入的内联列表记录转换为集合引用，并在下一次刷写时以新格式写回
+        for stream_id, stream_data in data.items():
+            normalized = ComponentSets.normalize(stream_data)
+            if normalized is not stream_data:
+                data[stream_id] = normalized
+                cls._pending.setdefault(stream_id, normalized)
+        
+        # 尚未写盘的变更以内存为准
+        for stream_id, stream_data in cls._pending.items():
+            if stream_data is None:
+                data.pop(stream_id, None)
+            else:
+                data[stream_id] = stream_data
+        cls._data = data
+        cls._rebuild_expiry_heap()
+    
+    @classmethod
+    def _collect_external_locked(cls):
+        """
+        读取其他进程的修改并暂存，调用方需持有_storage_lock（多进程模式下还需持有文件锁）
+        可能在刷写线程中调用，因此只暂存，由事件循环中的_apply_external应用到内存索引
+        """
+        signature = cls._signature()
+        if signature == cls._storage_signature:
+            return
         try:
-            cls._ensure_config_file()
-            with open(cls._config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with SilenceMetrics.timer("storage.load"), SilenceTracer.span("load_data") as span:
+                sets = cls._storage.load_component_sets()
+                changes = cls._storage.load_changes()
+                reload = cls._storage.load_all() if changes is None else None
+                # 规则没有增量读取，数量很少，整体读出
+                schedules = cls._storage.load_schedules() if cls._process_lock is not None and cls._schedule_listener else None
+                span.set(incremental=changes is not None)
         except Exception as e:
+            # 签名保持不变，下一次检查时重试
             logger.error(f"加载配置文件失败: {str(e)}")
+            return
+        SilenceMetrics.incr("storage.reload" if changes is None else "storage.incremental_reload")
+        
+        with cls._external_lock:
+            cls._external_sets.update(sets)
+            if schedules is not None:
+                cls._external_schedules = schedules
+            if reload is not None:
+                cls._external_reload, cls._external_changes = reload, {}
+            elif cls._external_reload is not None:
+                for stream_id, stream_data in changes.items():
+                    if stream_data is None:
+                        cls._external_reload.pop(stream_id, None)
+                    else:
+                        cls._external_reload[stream_id] = stream_data
+            else:
+                cls._external_changes.update(changes)
+        cls._storage_signature = signature
+    
+    @classmethod
+    def _supersede_external(cls, batch: Dict[str, Optional[Dict]]):
+        """
+        刚写入的变更比写入前暂存的其他进程的修改更新，丢弃暂存中的同一批聊天流
+        否则之后应用暂存时过时的值会覆盖内存索引，与存储不一致
+        """
+        with cls._external_lock:
+            for stream_id, stream_data in batch.items():
+                cls._external_changes.pop(stream_id, None)
+                if cls._external_reload is None:
+                    continue
+                if stream_data is None:
+                    cls._external_reload.pop(stream_id, None)
+                else:
+                    cls._external_reload[stream_id] = stream_data
+    
+    @classmethod
+    def _apply_external(cls):
+        """
+        把暂存的其他进程的修改应用到内存索引
+        - 本进程尚未写盘的变更优先
+        - 被其他进程加入/移除沉默的聊天流同样在本进程中禁用/恢复组件，并唤醒等待中的SilenceStopAction
+        """
+        with cls._external_lock:
+            sets, cls._external_sets = cls._external_sets, {}
+            reload, cls._external_reload = cls._external_reload, None
+            changes, cls._external_changes = cls._external_changes, {}
+            schedules, cls._external_schedules = cls._external_schedules, None
+        if sets:
+            ComponentSets.load(sets)
+        if schedules is not None and cls._schedule_listener is not None:
+            try:
+                cls._schedule_listener(schedules)
+            except Exception as e:
+                logger.error(f"同步其他进程的定时沉默规则时出错: {str(e)}")
+        if reload is not None:
+            changes = {stream_id: None for stream_id in cls._data if stream_id not in reload}
+            changes.update(reload)
+        if not changes:
+            return
+        
+        applied = 0
+        previous_top = cls._expiry_heap[0] if cls._expiry_heap else None
+        for stream_id, stream_data in changes.items():
+            if stream_id in cls._pending:
+                continue
+            current = cls._data.get(stream_id)
+            if stream_data is not None:
+                stream_data = ComponentSets.normalize(stream_data)
+            if stream_data == current:
+                continue
+            applied += 1
+            try:
+                if stream_data is None:
+                    del cls._data[stream_id]
+                    ComponentToggle.enable(stream_id, *ComponentSets.resolve(current))
+                    SilenceWatcher.notify_unsilenced(stream_id, "removed")
+                    continue
+                cls._data[stream_id] = stream_data
+                if current is None:
+                    SilenceWatcher.reset(stream_id)
+                ComponentToggle.disable(stream_id, *ComponentSets.resolve(stream_data))
+            except Exception as e:
+                logger.error(f"同步聊天流 {stream_id} 的组件状态时出错: {str(e)}")
+            if stream_data.get("expiration") is not None:
+                heapq.heappush(cls._expiry_heap, (stream_data["expiration"], stream_id))
+        if not applied:
+            return
+        
+        SilenceMetrics.incr("storage.external_changes", applied)
+        cls._ensure_expiry_task()
+        if cls._expiry_wakeup and (cls._expiry_heap[0] if cls._expiry_heap else None) != previous_top:
+            cls._expiry_wakeup.set()
+        cls._notify_changed()
+        logger.debug(f"已同步其他进程的 {applied} 条沉默状态修改")
+    
+    @classmethod
+    def _read_storage(cls) -> Dict[str, Dict]:
+        """从存储后端重建所有数据（先读组件集合表，记录中引用的集合才能解析）"""
+        try:
+            ComponentSets.load(cls._storage.load_component_sets())
+            return cls._storage.load_all()
+        except Exception as e:
+            logger.error(f"加载配置文件失败: {str(e)}")
+            return {}
+    
+    @classmethod
+    def _load_data(cls) -> Dict[str, Dict]:
+        """获取所有数据（内存索引，文件被外部修改时自动重新加载）"""
+        cls._refresh_if_changed()
+        return cls._data
+    
+    @classmethod
+    def _put(cls, stream_id: str, stream_data: Dict):
+        """写入单个聊天流的状态：立即更新内存索引，写盘交给后台刷写"""
+        cls._put_many({stream_id: stream_data})
+    
+    @classmethod
+    def _put_many(cls, changes: Dict[str, Dict]):
+        """写入一批聊天流的状态，只安排一次写盘、只通知一次变化"""
+        if not changes:
+            return
+        cls._data.update(changes)
+        cls._pending.update(changes)
+        cls._schedule_flush()
+        cls._notify_changed()
+    
+    @classmethod
+    def _delete(cls, stream_id: str):
+        """移除单个聊天流的状态"""
+        cls._delete_many((stream_id,))
+    
+    @classmethod
+    def _delete_many(cls, stream_ids: Iterable[str]):
+        """移除一批聊天流的状态，只安排一次写盘、只通知一次变化"""
+        removed = False
+        for stream_id in stream_ids:
+            if cls._data.pop(stream_id, None) is not None:
+                cls._pending[stream_id] = None
+                removed = True
+        if not removed:
+            return
+        cls._schedule_flush()
+        cls._notify_changed()
+    
+    @classmethod
+    def add_change_listener(cls, listener: Callable[[Dict[str, Dict], float], None]):
+        """注册沉默集合变化的回调，注册时立即以当前状态调用一次"""
+        cls._change_listeners.append(listener)
+        listener(cls._data, cls.next_expiration())
+    
+    @classmethod
+    def _notify_changed(cls):
+        next_expiration = cls.next_expiration()
+        for listener in cls._change_listeners:
+            try:
+                listener(cls._data, next_expiration)
+            except Exception as e:
+                logger.error(f"沉默状态变化回调出错: {str(e)}")
+    
+    @classmethod
+    def next_expiration(cls) -> float:
+        """
+        最早的到期时间，没有定时沉默时为inf
+        堆顶可能是已失效的条目，因此这是一个保守（偏早）的值
+        """
+        return cls._expiry_heap[0][0] if cls._expiry_heap else float("inf")
+    
+    @classmethod
+    def _schedule_flush(cls):
+        """在flush_delay内合并这段时间的所有变更为一次写入；没有事件循环时直接同步写盘"""
+        if cls._flush_task is not None and not cls._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            cls._flush_pending()
+            return
+        cls._flush_task = loop.create_task(cls._flush_later())
+    
+    @classmethod
+    async def _flush_later(cls):
+        # 写盘期间产生的新变更不会再安排刷写（本任务尚未结束），由本任务继续写入直到队列为空；
+        # 写入失败时停止，等待下一次变更再重试
+        while cls._pending:
+            await asyncio.sleep(cls._flush_delay)
+            if not await cls._flush_async():
+                break
+    
+    @classmethod
+    async def _flush_async(cls) -> bool:
+        """在线程池中写盘，不阻塞事件循环，返回是否写入成功"""
+        if not cls._pending:
+            return True
+        return await asyncio.get_running_loop().run_in_executor(None, cls._flush_pending)
+    
+    @classmethod
+    async def _persist(cls):
+        """
+        add_silence/remove_silence 在确认前调用，按耐久性配置决定是否等待写盘
+        sync模式下写盘失败时抛出OSError，变更保留在内存中并安排重试，调用方不应确认操作已持久化
+        """
+        if cls._durability != "sync" or await cls._flush_async():
+            return
+        cls._schedule_flush()
+        raise OSError("沉默状态写盘失败，变更已保留在内存中，稍后重试")
+    
+    @classmethod
+    def _flush_pending(cls) -> bool:
+        """把累积的变更一次性写入存储后端，必要时顺带压缩日志，返回是否写入成功"""
+        with cls._storage_lock, cls._exclusive():
+            # 先追上进程外的写入，否则写盘后更新的签名会掩盖它们，存储后端的增量读取位置也才能跳过自己写入的部分
+            cls._collect_external_locked()
+            batch, cls._pending = cls._pending, {}
+            # 在取出变更之后再取集合：变更引用的集合一定已经登记，且先于记录写入
+            set_changes = ComponentSets.take_changes()
+            if set_changes is not None:
+                try:
+                    cls._storage.save_component_sets(*set_changes)
+                except Exception as e:
+                    SilenceMetrics.incr("storage.flush_errors")
+                    logger.error(f"保存组件集合表失败: {str(e)}")
+                    ComponentSets.restore_changes(*set_changes)
+                    for stream_id, stream_data in batch.items():
+                        cls._pending.setdefault(stream_id, stream_data)
+                    return False
+            if batch:
+                try:
+                    with SilenceMetrics.timer("storage.flush"), SilenceTracer.span("save_data", records=len(batch)):
+                        cls._storage.apply_batch(batch)
+                    SilenceMetrics.incr("storage.flushed_records", len(batch))
+                    cls._supersede_external(batch)
+                except Exception as e:
+                    SilenceMetrics.incr("storage.flush_errors")
+                    logger.error(f"保存配置文件失败: {str(e)}")
+                    # 写入失败的变更放回队列，等待下一次刷写（不覆盖更新的变更）
+                    for stream_id, stream_data in batch.items():
+                        cls._pending.setdefault(stream_id, stream_data)
+                    return False
+            cls._compact_if_needed()
+            if cls._process_lock is None:
+                cls._storage_signature = cls._storage.signature()
+            elif batch or set_changes is not None:
+                cls._storage_signature = cls._process_lock.bump()
+        return True
+    
+    @classmethod
+    def _compact_if_needed(cls):
+        """日志过长时把当前状态压缩为新快照，调用方需持有_storage_lock"""
+        try:
+            if not cls._storage.needs_compaction() or not cls._storage.begin_compaction():
+                return
+            # 记录对象只会被整体替换，dict.copy()即可得到一致的快照；
+            # 多进程模式下内存索引可能还没应用其他进程的修改，以存储中的完整状态为准
+            snapshot = cls._storage.load_all() if cls._process_lock is not None else cls._data.copy()
+            with SilenceMetrics.timer("storage.compaction"):
+                cls._storage.finish_compaction(snapshot)
+            logger.debug(f"已压缩沉默日志，当前共 {len(snapshot)} 条沉默状态")
+        except Exception as e:
+            logger.error(f"压缩沉默日志失败: {str(e)}")
+    
+    @classmethod
+    def load_schedules(cls) -> Dict[str, Dict]:
+        """读取保存的定时沉默规则"""
+        try:
+            with cls._storage_lock:
+                return cls._storage.load_schedules()
+        except Exception as e:
+            logger.error(f"加载定时沉默规则失败: {str(e)}")
             return {}
     
     @classmethod
-    def _save_data(cls, data: Dict[str, Dict]):
-        """保存数据到JSON文件"""
+    def reload_schedules(cls) -> Optional[Dict[str, Dict]]:
+        """
+        多进程模式下读取存储中最新的定时沉默规则
+        单进程模式下本进程的规则就是最新的，与读取失败一样返回None
+        """
+        if cls._process_lock is None:
+            return None
+        try:
+            with cls._storage_lock, cls._process_lock.hold(shared=True):
+                return cls._storage.load_schedules()
+        except Exception as e:
+            logger.error(f"加载定时沉默规则失败: {str(e)}")
+            return None
+    
+    @classmethod
+    def set_schedule_listener(cls, listener: Callable[[Dict[str, Dict]], None]):
+        """注册其他进程修改定时沉默规则后的回调（仅多进程模式下会被调用）"""
+        cls._schedule_listener = listener
+    
+    @classmethod
+    def save_schedules(cls, changes: Dict[str, Optional[Dict]]):
+        """保存定时沉默规则的变更（值为None表示删除），规则很少变化，直接同步写入"""
         try:
-            with open(cls._config_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with cls._storage_lock, cls._exclusive():
+                cls._write_schedules_locked(changes)
         except Exception as e:
-            logger.error(f"保存配置文件失败: {str(e)}")
+            logger.error(f"保存定时沉默规则失败: {str(e)}")
+    
+    @classmethod
+    def update_schedules(cls, update: Callable[[Dict[str, Dict]], Dict[str, Optional[Dict]]]):
+        """
+        在锁内读出存储中最新的规则，由update算出变更后写入
+        多进程模式下用于避免以本进程过时的规则覆盖其他进程的修改
+        """
+        try:
+            with cls._storage_lock, cls._exclusive():
+                changes = update(cls._storage.load_schedules())
+                if changes:
+                    cls._write_schedules_locked(changes)
+        except Exception as e:
+            logger.error(f"保存定时沉默规则失败: {str(e)}")
+    
+    @classmethod
+    def _write_schedules_locked(cls, changes: Dict[str, Optional[Dict]]):
+        """写入规则的变更，调用方需持有_storage_lock（多进程模式下还需持有排他文件锁）"""
+        if cls._process_lock is None:
+            cls._storage.save_schedules(changes)
+            return
+        # 与刷写相同：先追上其他进程的写入，再让代数加一通知其他进程
+        cls._collect_external_locked()
+        cls._storage.save_schedules(changes)
+        cls._storage_signature = cls._process_lock.bump()
+        with cls._external_lock:
+            # 刚暂存的其他进程的规则不包含本次写入
+            if cls._external_schedules is not None:
+                for stream_id, rule in changes.items():
+                    if rule is None:
+                        cls._external_schedules.pop(stream_id, None)
+                    else:
+                        cls._external_schedules[stream_id] = rule
+    
+    @classmethod
+    def flush(cls):
+        """立即把所有未写盘的变更写入存储，插件关闭时调用"""
+        if cls._storage is None:
+            return
+        cls._flush_pending()
     
     @classmethod
     def is_silenced(cls, stream_id: str) -> bool:
@@ -60,104 +578,274 @@ class SilenceCore:
         - 自动清理过期项
         - 返回当前真实的沉默状态
         """
-        data = cls._load_data()
+        stream_data = cls._load_data().get(stream_id)
         
-        if stream_id not in data:
+        if stream_data is None:
+            SilenceMetrics.incr("lookup.not_silenced")
             return False
         
-        stream_data = data[stream_id]
         expiration = stream_data.get("expiration")
         
         # 永久沉默
         if expiration is None:
+            SilenceMetrics.incr("lookup.silenced")
             return True
         
+        # 确保到期调度器在事件循环中运行（例如重启后首次查询时）
+        if cls._expiry_task is None and cls._expiry_heap:
+            cls._ensure_expiry_task()
+        
         # 检查是否过期
         current_time = time.time()
         if expiration and expiration >= current_time:
+            SilenceMetrics.incr("lookup.silenced")
             return True  # 未过期，仍在沉默中
         
-        # 已过期，自动清理并恢复组件
-        cls._auto_cleanup_expired(stream_id, stream_data)
+        SilenceMetrics.incr("lookup.expired")
+        # 已过期：正常情况下由到期调度器准时清理，这里仅在调度器无法运行时兜底
+        if not cls._expiry_running():
+            cls._auto_cleanup_expired(stream_id, stream_data)
         return False
     
     @classmethod
     def _auto_cleanup_expired(cls, stream_id: str, stream_data: Dict):
         """自动清理过期的沉默状态"""
         try:
-            # 恢复被禁用的组件
-            disabled_actions = stream_data.get("disabled_actions", [])
-            disabled_commands = stream_data.get("disabled_commands", [])
-            cls._enable_components(stream_id, disabled_actions, disabled_commands)
+            with SilenceTracer.span("expire", stream_id):
+                # 恢复被禁用的组件
+                cls._enable_components(stream_id, *ComponentSets.resolve(stream_data))
+                
+                # 从数据中移除
+                cls._delete(stream_id)
+                
+                # 唤醒该聊天流上等待的SilenceStopAction
+                SilenceWatcher.notify_unsilenced(stream_id, "expired")
+            
+            # 到期回复只进入回复队列，不影响状态恢复
+            SilenceAnnouncer.announce_expiry(stream_id, stream_data.get("source", "command"))
             
-            # 从数据中移除
-            data = cls._load_data()
-            if stream_id in data:
-                del data[stream_id]
-                cls._save_data(data)
+            # 到期时刻与实际清理时刻之间的延迟
+            SilenceMetrics.incr("expiry.fired")
+            if stream_data.get("expiration") is not None:
+                SilenceMetrics.observe("expiry.lag", max(0.0, time.time() - stream_data["expiration"]))
             
             logger.info(f"自动清理了过期的沉默状态: {stream_id}")
         except Exception as e:
             logger.error(f"自动清理过期状态时出错: {str(e)}")
     
+    @classmethod
+    def _rebuild_expiry_heap(cls):
+        """根据当前内存索引重建到期堆"""
+        cls._expiry_heap = [
+            (stream_data["expiration"], stream_id)
+            for stream_id, stream_data in cls._data.items()
+            if stream_data.get("expiration") is not None
+        ]
+        heapq.heapify(cls._expiry_heap)
+        cls._ensure_expiry_task()
+        if cls._expiry_wakeup:
+            cls._expiry_wakeup.set()
+        cls._notify_changed()
+    
+    @classmethod
+    def _schedule_expiry(cls, stream_id: str, expiration: Optional[float]):
+        """登记一个到期时间，O(log n)"""
+        cls._schedule_expiry_many([stream_id], expiration)
+    
+    @classmethod
+    def _schedule_expiry_many(cls, stream_ids: List[str], expiration: Optional[float]):
+        """为一批聊天流登记同一个到期时间，最多唤醒调度器一次"""
+        if expiration is None or not stream_ids:
+            return
+        previous_top = cls._expiry_heap[0] if cls._expiry_heap else None
+        for stream_id in stream_ids:
+            heapq.heappush(cls._expiry_heap, (expiration, stream_id))
+        cls._ensure_expiry_task()
+        # 只有堆顶变化时才需要唤醒调度器重新计算等待时间
+        if cls._expiry_heap[0] != previous_top:
+            if cls._expiry_wakeup:
+                cls._expiry_wakeup.set()
+            cls._notify_changed()
+    
+    @classmethod
+    def _expiry_running(cls) -> bool:
+        return cls._expiry_task is not None and not cls._expiry_task.done()
+    
+    @classmethod
+    def start_expiry_scheduler(cls):
+        """在当前事件循环中启动到期调度器（已在运行时不做任何事）"""
+        if cls._expiry_heap:
+            cls._ensure_expiry_task()
+    
+    @classmethod
+    def _ensure_expiry_task(cls):
+        """在当前事件循环中启动到期调度器（没有运行中的事件循环时延后启动）"""
+        if cls._expiry_running():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        cls._expiry_wakeup = asyncio.Event()
+        cls._expiry_task = loop.create_task(cls._expiry_loop())
+    
+    @classmethod
+    def _pop_due(cls, now: float) -> List[Tuple[str, Dict]]:
+        """
+        弹出所有已到期的条目
+        - 堆中已被移除或重新设置过期时间的条目视为过时，直接丢弃
+        """
+        due = []
+        while cls._expiry_heap and cls._expiry_heap[0][0] <= now:
+            expiration, stream_id = heapq.heappop(cls._expiry_heap)
+            stream_data = cls._data.get(stream_id)
+            if stream_data is not None and stream_data.get("expiration") == expiration:
+                due.append((stream_id, stream_data))
+        return due
+    
+    @classmethod
+    async def _expiry_loop(cls):
+        """到期调度器主循环：睡到最近的截止时间，准时恢复组件并移除状态"""
+        await run_deadline_loop("到期调度器", cls._expiry_wakeup, cls._expire_due,
+                                lambda: cls._expiry_heap[0][0] if cls._expiry_heap else None)
+    
+    @classmethod
+    async def _expire_due(cls, now: float):
+        for stream_id, stream_data in cls._pop_due(now):
+            cls._expire(stream_id, stream_data)
+    
+    @classmethod
+    def _expire(cls, stream_id: str, stream_data: Dict) -> bool:
+        """
+        让一个到期的聊天流结束沉默，返回是否已清理或已排队清理
+        该聊天流有正在进行的添加/移除操作时，排队等它结束后再清理，避免交错
+        """
+        lock = cls._stream_locks.get(stream_id)
+        if lock is None or not lock.locked():
+            cls._auto_cleanup_expired(stream_id, stream_data)
+            return True
+        
+        expiration = stream_data.get("expiration")
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 不在事件循环中（例如手动清理）时无法排队，放回到期堆，由到期调度器在操作结束后清理
+            heapq.heappush(cls._expiry_heap, (expiration, stream_id))
+            return False
+        
+        async def expire_after_inflight() -> bool:
+            current = cls._data.get(stream_id)
+            if current is None or current.get("expiration") != expiration:
+                return False  # 期间已被移除或重新沉默
+            cls._auto_cleanup_expired(stream_id, current)
+            return True
+        
+        task = loop.create_task(cls._run_locked(stream_id, expire_after_inflight))
+        cls._expire_tasks.add(task)
+        task.add_done_callback(cls._expire_tasks.discard)
+        return True
+    
+    @classmethod
+    async def _run_locked(cls, stream_id: str, operation: Callable[[], Awaitable[bool]]) -> bool:
+        """持有该聊天流的锁执行操作；不同聊天流的锁互不影响"""
+        lock = cls._stream_locks.get(stream_id)
+        if lock is None:
+            lock = cls._stream_locks[stream_id] = asyncio.Lock()
+        cls._lock_users[stream_id] = cls._lock_users.get(stream_id, 0) + 1
+        try:
+            with SilenceTracer.span("lock_wait", stream_id):
+                await lock.acquire()
+            try:
+                return await operation()
+            finally:
+                lock.release()
+        finally:
+            # 没有其他使用者时回收锁，避免锁字典随聊天流数量无限增长
+            cls._lock_users[stream_id] -= 1
+            if cls._lock_users[stream_id] == 0:
+                del cls._lock_users[stream_id]
+                del cls._stream_locks[stream_id]
+    
+    @classmethod
+    async def _single_flight(cls, stream_id: str, transition: str, operation: Callable[[], Awaitable[bool]]) -> bool:
+        """
+        同一聊天流的同一种状态转换只执行一次
+        - 并发的相同请求共享正在进行的操作及其结果
+        - 同一聊天流的不同操作由锁串行化
+        """
+        key = (stream_id, transition)
+        inflight = cls._inflight.get(key)
+        if inflight is not None:
+            logger.debug(f"聊天流 {stream_id} 的 {transition} 操作正在进行，复用其结果")
+            SilenceMetrics.incr("transition.coalesced")
+            return await asyncio.shield(inflight)
+        
+        task = asyncio.ensure_future(cls._run_locked(stream_id, operation))
+        cls._inflight[key] = task
+        
+        def forget(_):
+            if cls._inflight.get(key) is task:
+                del cls._inflight[key]
+        task.add_done_callback(forget)
+        # shield: 某个调用方被取消时不影响其他共享该操作的调用方
+        return await asyncio.shield(task)
+    
     @classmethod
     async def add_silence(cls, type, stream, stream_id: str, duration: Optional[float] = None, 
                    disabled_actions: Optional[List[str]] = None, 
-                   disabled_commands: Optional[List[str]] = None) -> bool:
+                   disabled_commands: Optional[List[str]] = None,
+                   source: Optional[str] = None, announce: bool = True) -> bool:
         """
         添加沉默状态
+        - source: 记录在沉默状态中的来源，默认按type为command/action
+        - announce: 是否发送沉默回复（定时沉默不发送）
         返回: True=成功添加, False=已经在沉默中
         """
+        source = source or ("command" if type else "action")
+        with SilenceTracer.span("add_silence", stream_id, source=source) as span:
+            result = await cls._single_flight(
+                stream_id, "add",
+                lambda: cls._do_add_silence(type, stream, stream_id, duration, disabled_actions, disabled_commands, source, announce)
+            )
+            span.set(result=result)
+            return result
+    
+    @classmethod
+    async def _do_add_silence(cls, type, stream, stream_id: str, duration: Optional[float],
+                              disabled_actions: Optional[List[str]],
+                              disabled_commands: Optional[List[str]],
+                              source: str, announce: bool) -> bool:
         if cls.is_silenced(stream_id):
             logger.warning(f"聊天流 {stream_id} 已经处于沉默状态")
             return False
 
-        success, reply_set, prompt = None, None, None
-
         logger.info("add_silence 已触发")
-
-        if type: # Command Mute
-            success, reply_set, prompt = await generator_api.rewrite_reply(
-                chat_stream=stream,
-                raw_reply="好吧...",
-                reason="用户将你禁言，表现出失落难过，简短的一句话，必须回复内容",
-                return_prompt=True
-            )
-        else: # Action Mute
-            success, reply_set, prompt = await generator_api.rewrite_reply(
-                chat_stream=stream, 
-                raw_reply="我先不说话了",
-                reason="你打算自己禁言自己，简短的一句话，必须回复内容",
-                return_prompt=True
-            )
-
-        logger.debug(prompt)
-
-        if success and reply_set:
-            for reply_type, reply_content in reply_set:
-                if reply_type == "text":
-                    await send_api.text_to_stream(text=reply_content, stream_id=stream_id)
-                elif reply_type == "emoji":
-                    await send_api.emoji_to_stream(emoji_base64=reply_content, stream_id=stream_id)
-            
         
         # 计算过期时间
         expiration = time.time() + duration if duration else None
         
-        # 保存数据
+        # 保存数据（组件列表登记到集合表，记录中只保存集合ID）
+        set_id = ComponentSets.intern(disabled_actions or [], disabled_commands or [])
         stream_data = {
             "expiration": expiration,
-            "disabled_actions": disabled_actions or [],
-            "disabled_commands": disabled_commands or []
+            "components": set_id,
+            "source": source
         }
         
-        data = cls._load_data()
-        data[stream_id] = stream_data
-        cls._save_data(data)
+        cls._put(stream_id, stream_data)
+        cls._schedule_expiry(stream_id, expiration)
+        SilenceWatcher.reset(stream_id)
         
         # 禁用组件
-        cls._disable_components(stream_id, disabled_actions or [], disabled_commands or [])
+        cls._disable_components(stream_id, *ComponentSets.get(set_id))
+        with SilenceTracer.span("persist"):
+            await cls._persist()
         
+        # 状态已生效，回复在后台生成和发送
+        if announce:
+            SilenceAnnouncer.announce("command_mute" if type else "action_mute", stream, stream_id)
+        
+        SilenceMetrics.incr("silence.added")
         duration_str = f"{duration}秒" if duration else "永久"
         logger.info(f"已添加聊天流 {stream_id} 到沉默列表，持续时间: {duration_str}")
         return True
@@ -168,125 +856,178 @@ class SilenceCore:
         移除沉默状态
         返回: True=成功移除, False=不在沉默中
         """
+        with SilenceTracer.span("remove_silence", stream_id, source="command" if type else "action") as span:
+            result = await cls._single_flight(stream_id, "remove", lambda: cls._do_remove_silence(type, stream, stream_id))
+            span.set(result=result)
+            return result
+    
+    @classmethod
+    async def _do_remove_silence(cls, type, stream, stream_id: str) -> bool:
         if not cls.is_silenced(stream_id):
             logger.warning(f"聊天流 {stream_id} 未处于沉默状态")
             return False
         
-        success, reply_set = None, None, None
-
         logger.info("remove_silence 已触发")
         
-        if type: # Command Mute
-            success, reply_set, prompt = await generator_api.rewrite_reply(
-                chat_stream=stream,
-                raw_reply="又能说话了！",
-                reason="你的禁言时间到或被用户取消，表现出开心兴奋，简短的一句话，必须回复内容",
-                return_prompt=True
-            )
-        else: # Action Mute
-            success, reply_set, prompt = await generator_api.rewrite_reply(
-                chat_stream=stream,
-                raw_reply="我可以说话了",
-                reason="你自行禁言时间结束，简短的一句话，必须回复内容",
-                return_prompt=True
-            )
-            
-        logger.debug(prompt)
-
-        if success and reply_set:
-            for reply_type, reply_content in reply_set:
-                if reply_type == "text":
-                    await send_api.text_to_stream(text=reply_content, stream_id=stream_id)
-                elif reply_type == "emoji":
-                    await send_api.emoji_to_stream(emoji_base64=reply_content, stream_id=stream_id)
-        
         # 获取数据用于恢复组件
-        data = cls._load_data()
-        stream_data = data.get(stream_id, {})
+        stream_data = cls._load_data().get(stream_id, {})
         
         # 恢复组件
-        disabled_actions = stream_data.get("disabled_actions", [])
-        disabled_commands = stream_data.get("disabled_commands", [])
-        cls._enable_components(stream_id, disabled_actions, disabled_commands)
+        cls._enable_components(stream_id, *ComponentSets.resolve(stream_data))
         
         # 移除数据
-        if stream_id in data:
-            del data[stream_id]
-            cls._save_data(data)
+        cls._delete(stream_id)
+        SilenceWatcher.notify_unsilenced(stream_id, "removed")
+        with SilenceTracer.span("persist"):
+            await cls._persist()
         
+        # 状态已恢复，回复在后台生成和发送
+        SilenceAnnouncer.announce("command_unmute" if type else "action_unmute", stream, stream_id)
+        
+        SilenceMetrics.incr("silence.removed")
         logger.info(f"已移除聊天流 {stream_id} 的沉默状态")
         return True
     
     @classmethod
-    def _disable_components(cls, stream_id: str, disabled_actions: List[str], disabled_commands: List[str]):
-        """禁用指定组件"""
-        try:
-            # 禁用Action组件
-            for action_name in disabled_actions:
-                component_manage_api.locally_disable_component(
-                    action_name, ComponentType.ACTION, stream_id
-                )
+    async def add_silence_many(cls, type, streams: Dict[str, Any], duration: Optional[float] = None,
+                               disabled_actions: Optional[List[str]] = None,
+                               disabled_commands: Optional[List[str]] = None,
+                               source: Optional[str] = None, announce: bool = True) -> List[str]:
+        """
+        批量添加沉默状态，streams为 {聊天流ID: 聊天流对象}
+        - 所有状态变更在一次同步执行中完成，只安排一次写盘、只通知一次变化
+        - 组件开关一次遍历完成，回复以有限并发在后台发出
+        - 已经在沉默中或正在单独处理的聊天流会被跳过
+        - source与announce的含义同add_silence
+        返回: 实际进入沉默的聊天流ID
+        """
+        source = source or ("command" if type else "action")
+        with SilenceTracer.span("add_silence_many", source=source) as span:
+            expiration = time.time() + duration if duration else None
+            # 整批共用一个集合
+            set_id = ComponentSets.intern(disabled_actions or [], disabled_commands or [])
+            changes = {}
+            for stream_id in streams:
+                if (stream_id, "add") in cls._inflight or cls.is_silenced(stream_id):
+                    continue
+                changes[stream_id] = {
+                    "expiration": expiration,
+                    "components": set_id,
+                    "source": source
+                }
+            if not changes:
+                span.set(count=0)
+                return []
             
-            # 禁用Command组件  
-            for command_name in disabled_commands:
-                component_manage_api.locally_disable_component(
-                    command_name, ComponentType.COMMAND, stream_id
-                )
-
-            # 启用SilenceStopAction
-            component_manage_api.locally_enable_component(
-                "silence_stop_action", ComponentType.ACTION, stream_id
-            )
+            added = list(changes)
+            cls._put_many(changes)
+            cls._schedule_expiry_many(added, expiration)
+            for stream_id in added:
+                SilenceWatcher.reset(stream_id)
+            components = ComponentSets.get(set_id)
+            cls._disable_components_many({stream_id: components for stream_id in added})
+            with SilenceTracer.span("persist"):
+                await cls._persist()
+            span.set(count=len(added))
+        
+        if announce:
+            SilenceAnnouncer.announce_many("command_mute" if type else "action_mute", [(streams[stream_id], stream_id) for stream_id in added])
+        SilenceMetrics.incr("silence.added", len(added))
+        duration_str = f"{duration}秒" if duration else "永久"
+        logger.info(f"已批量添加 {len(added)} 个聊天流到沉默列表，持续时间: {duration_str}")
+        return added
+    
+    @classmethod
+    async def remove_silence_many(cls, type, streams: Dict[str, Any]) -> List[str]:
+        """
+        批量移除沉默状态，streams为 {聊天流ID: 聊天流对象}
+        返回: 实际解除沉默的聊天流ID
+        """
+        with SilenceTracer.span("remove_silence_many", source="command" if type else "action") as span:
+            removed = {}
+            for stream_id in streams:
+                if (stream_id, "remove") in cls._inflight or not cls.is_silenced(stream_id):
+                    continue
+                removed[stream_id] = ComponentSets.resolve(cls._data[stream_id])
+            if not removed:
+                span.set(count=0)
+                return []
             
-            logger.info(f"已为聊天流 {stream_id} 禁用 {len(disabled_actions)} 个Action和 {len(disabled_commands)} 个Command")
+            cls._enable_components_many(removed)
+            cls._delete_many(removed)
+            for stream_id in removed:
+                SilenceWatcher.notify_unsilenced(stream_id, "removed")
+            with SilenceTracer.span("persist"):
+                await cls._persist()
+            span.set(count=len(removed))
+        
+        SilenceAnnouncer.announce_many("command_unmute" if type else "action_unmute", [(streams[stream_id], stream_id) for stream_id in removed])
+        SilenceMetrics.incr("silence.removed", len(removed))
+        logger.info(f"已批量移除 {len(removed)} 个聊天流的沉默状态")
+        return list(removed)
+    
+    @classmethod
+    def _disable_components_many(cls, components: Dict[str, Tuple[Iterable[str], Iterable[str]]]):
+        """一次遍历为一批聊天流禁用组件，只输出一条汇总日志"""
+        total = 0
+        with SilenceMetrics.timer("component.toggle"), SilenceTracer.span("disable_components", streams=len(components)):
+            for stream_id, (disabled_actions, disabled_commands) in components.items():
+                try:
+                    total += sum(ComponentToggle.disable(stream_id, disabled_actions, disabled_commands))
+                except Exception as e:
+                    logger.error(f"为聊天流 {stream_id} 禁用组件时出错: {str(e)}")
+        SilenceMetrics.incr("component.disabled", total)
+        logger.info(f"已为 {len(components)} 个聊天流共禁用 {total} 个组件")
+    
+    @classmethod
+    def _enable_components_many(cls, components: Dict[str, Tuple[Iterable[str], Iterable[str]]]):
+        """一次遍历为一批聊天流恢复组件，只输出一条汇总日志"""
+        total = 0
+        with SilenceMetrics.timer("component.toggle"), SilenceTracer.span("enable_components", streams=len(components)):
+            for stream_id, (disabled_actions, disabled_commands) in components.items():
+                try:
+                    total += sum(ComponentToggle.enable(stream_id, disabled_actions, disabled_commands))
+                except Exception as e:
+                    logger.error(f"为聊天流 {stream_id} 恢复组件时出错: {str(e)}")
+        SilenceMetrics.incr("component.enabled", total)
+        logger.info(f"已为 {len(components)} 个聊天流共恢复 {total} 个组件")
+    
+    @classmethod
+    def _disable_components(cls, stream_id: str, disabled_actions: Iterable[str], disabled_commands: Iterable[str]):
+        """禁用指定组件（只处理与当前状态的差异）"""
+        try:
+            with SilenceMetrics.timer("component.toggle"), SilenceTracer.span("disable_components", stream_id) as span:
+                action_count, command_count = ComponentToggle.disable(stream_id, disabled_actions, disabled_commands)
+                span.set(actions=action_count, commands=command_count)
+            SilenceMetrics.incr("component.disabled", action_count + command_count)
+            logger.info(f"已为聊天流 {stream_id} 禁用 {action_count} 个Action和 {command_count} 个Command")
         except Exception as e:
             logger.error(f"禁用组件时出错: {str(e)}")
     
     @classmethod
-    def _enable_components(cls, stream_id: str, disabled_actions: List[str], disabled_commands: List[str]):
+    def _enable_components(cls, stream_id: str, disabled_actions: Iterable[str], disabled_commands: Iterable[str]):
         """启用指定组件"""
         try:
-            # 启用Action组件
-            for action_name in disabled_actions:
-                component_manage_api.locally_enable_component(
-                    action_name, ComponentType.ACTION, stream_id
-                )
-            
-            # 启用Command组件
-            for command_name in disabled_commands:
-                component_manage_api.locally_enable_component(
-                    command_name, ComponentType.COMMAND, stream_id
-                )
-
-            # 禁用SilenceStopAction
-            component_manage_api.locally_disable_component(
-                "silence_stop_action", ComponentType.ACTION, stream_id
-            )
-            
-            logger.info(f"已为聊天流 {stream_id} 恢复 {len(disabled_actions)} 个Action和 {len(disabled_commands)} 个Command")
+            with SilenceMetrics.timer("component.toggle"), SilenceTracer.span("enable_components", stream_id) as span:
+                action_count, command_count = ComponentToggle.enable(stream_id, disabled_actions, disabled_commands)
+                span.set(actions=action_count, commands=command_count)
+            SilenceMetrics.incr("component.enabled", action_count + command_count)
+            logger.info(f"已为聊天流 {stream_id} 恢复 {action_count} 个Action和 {command_count} 个Command")
         except Exception as e:
             logger.error(f"启用组件时出错: {str(e)}")
     
     @classmethod
     def get_all_silenced_streams(cls) -> Dict[str, Optional[float]]:
         """获取所有沉默中的聊天流（不自动清理，仅供查看）"""
-        data = cls._load_data()
-        result = {}
-        for stream_id, stream_data in data.items():
-            result[stream_id] = stream_data.get("expiration")
-        return result
+        return {stream_id: stream_data.get("expiration") for stream_id, stream_data in cls._load_data().items()}
     
     @classmethod
     def manual_cleanup_expired(cls) -> int:
         """手动清理所有过期的沉默状态，返回清理数量"""
+        cls._load_data()
         count = 0
-        current_time = time.time()
-        data = cls._load_data()
-        
-        for stream_id, stream_data in list(data.items()):
-            expiration = stream_data.get("expiration")
-            if expiration is not None and expiration <= current_time:
-                cls._auto_cleanup_expired(stream_id, stream_data)
+        for stream_id, stream_data in cls._pop_due(time.time()):
+            if cls._expire(stream_id, stream_data):
                 count += 1
         
         if count > 0:
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import Dict, Optional, Set
+from src.common.logger import get_logger
+from plugins.silence_plugin.backlog import SilenceBacklog
+
+logger = get_logger("Silence")
+
+class SilenceWatcher:
+    """
+    集中式的解除沉默监听器
+    - 每个沉默中的聊天流最多挂起一个等待者（SilenceStopAction）
+    - 只有艾特、到期或被移除这类事件才会唤醒对应聊天流，空闲的聊天流不产生任何开销
+    """
+
+    # 等待中的SilenceStopAction，键为聊天流ID
+    _waiters: Dict[str, asyncio.Future] = {}
+    # 在没有等待者时收到的艾特，等待者挂起时立即返回
+    _pending_mentions: Set[str] = set()
+    # 每个聊天流已经检查过的最后一条消息时间，增量扫描时只处理之后的新消息
+    _cursors: Dict[str, float] = {}
+
+    @classmethod
+    async def wait(cls, stream_id: str) -> str:
+        """
+        挂起直到该聊天流被唤醒
+        返回唤醒原因: "mention"=被艾特, "expired"=到期, "removed"=被指令移除
+        """
+        if stream_id in cls._pending_mentions:
+            cls._pending_mentions.discard(stream_id)
+            return "mention"
+
+        future = cls._waiters.get(stream_id)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            cls._waiters[stream_id] = future
+
+        try:
+            return await asyncio.shield(future)
+        finally:
+            # 等待者被取消时清理登记，避免残留的Future
+            if cls._waiters.get(stream_id) is future and not future.done():
+                del cls._waiters[stream_id]
+                future.cancel()
+
+    @classmethod
+    def waiter_count(cls) -> int:
+        """当前挂起的SilenceStopAction数量"""
+        return len(cls._waiters)
+
+    @classmethod
+    def _wake(cls, stream_id: str, reason: str) -> bool:
+        future = cls._waiters.pop(stream_id, None)
+        if future is None or future.done():
+            return False
+        future.set_result(reason)
+        return True
+
+    @classmethod
+    def notify_mention(cls, stream_id: str):
+        """沉默中的聊天流收到了艾特自身的消息"""
+        if not cls._wake(stream_id, "mention"):
+            cls._pending_mentions.add(stream_id)
+        logger.debug(f"聊天流 {stream_id} 收到艾特，已通知解除沉默")
+
+    @classmethod
+    def notify_unsilenced(cls, stream_id: str, reason: str):
+        """聊天流的沉默状态已经结束（到期或被移除）"""
+        cls._pending_mentions.discard(stream_id)
+        cls._cursors.pop(stream_id, None)
+        cls._wake(stream_id, reason)
+
+    @classmethod
+    def reset(cls, stream_id: str):
+        """开始新的沉默前清理该聊天流残留的通知与跳过的消息记录，并把扫描游标置于沉默开始时刻"""
+        cls._pending_mentions.discard(stream_id)
+        SilenceBacklog.discard(stream_id)
+        cls._cursors[stream_id] = time.time()
+
+    @classmethod
+    def get_cursor(cls, stream_id: str) -> Optional[float]:
+        return cls._cursors.get(stream_id)
+
+    @classmethod
+    def advance_cursor(cls, stream_id: str, message_time: float):
+        """游标只前进不后退"""
+        if message_time > cls._cursors.get(stream_id, 0.0):
+            cls._cursors[stream_id] = message_time
@@ -0,0 +1,624 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Set, TextIO, Tuple
+from src.common.logger import get_logger
+
+logger = get_logger("Silence")
+
+def _write_json_file(path: str, data: Dict[str, Any]):
+    """
+    先写临时文件再原子替换，避免写到一半崩溃损坏文件
+    每个键占一行：仍然便于阅读，同时可以使用C实现的编码器（indent会退回到纯Python实现）
+    """
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        lines = ",\n".join(
+            f"  {json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}"
+            for key, value in data.items()
+        )
+        f.write("{\n" + lines + "\n}\n" if lines else "{}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+class StorageBackend(ABC):
+    """沉默状态存储后端的接口，SilenceCore只通过这些方法读写持久化数据"""
+
+    # 组件集合表文件（见ComponentSets）与定时沉默规则文件，数据库类后端可以改为存在表中
+    component_sets_file: Optional[str] = None
+    schedules_file: Optional[str] = None
+
+    def ensure(self):
+        """确保存储可用（创建文件、建表、迁移旧数据等）"""
+
+    @abstractmethod
+    def signature(self) -> Any:
+        """廉价的变更标识，与上次不同说明存储被进程外修改过"""
+
+    @abstractmethod
+    def load_all(self) -> Dict[str, Dict]:
+        """读取所有聊天流的状态"""
+
+    def load_changes(self) -> Optional[Dict[str, Optional[Dict]]]:
+        """
+        上一次load_all/load_changes之后其他进程写入的变更（值为None表示删除）
+        返回None表示无法增量读取，调用方需要load_all
+        """
+        return None
+
+    @abstractmethod
+    def apply_batch(self, changes: Dict[str, Optional[Dict]]):
+        """批量写入一组变更，值为None表示删除"""
+
+    def load_component_sets(self) -> Dict[str, Dict]:
+        """读取组件集合表: 集合ID -> {"actions": [...], "commands": [...]}"""
+        if not self.component_sets_file or not os.path.exists(self.component_sets_file):
+            return {}
+        with open(self.component_sets_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_component_sets(self, added: Dict[str, Dict], removed: Set[str]):
+        """
+        把新增/删除的集合合并进集合表
+        集合ID由内容决定，与其他进程写入的条目合并不会冲突
+        """
+        if not self.component_sets_file:
+            return
+        sets = self.load_component_sets()
+        for set_id in removed:
+            sets.pop(set_id, None)
+        sets.update(added)
+        _write_json_file(self.component_sets_file, sets)
+
+    def load_schedules(self) -> Dict[str, Dict]:
+        """读取定时沉默规则: 聊天流ID -> 规则"""
+        if not self.schedules_file or not os.path.exists(self.schedules_file):
+            return {}
+        with open(self.schedules_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_schedules(self, changes: Dict[str, Optional[Dict]]):
+        """把规则的变更合并进规则文件，值为None表示删除"""
+        if not self.schedules_file:
+            return
+        schedules = self.load_schedules()
+        for stream_id, rule in changes.items():
+            if rule is None:
+                schedules.pop(stream_id, None)
+            else:
+                schedules[stream_id] = rule
+        _write_json_file(self.schedules_file, schedules)
+
+    def _migrate_legacy_tables(self, legacy: "JsonJournalStorage"):
+        """迁移旧JSON后端的组件集合表与定时沉默规则"""
+        sets = legacy.load_component_sets()
+        if sets:
+            self.save_component_sets(sets, set())
+        schedules = legacy.load_schedules()
+        if schedules:
+            self.save_schedules(schedules)
+        for path in (legacy.component_sets_file, legacy.schedules_file):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def begin_compaction(self) -> bool:
+        return False
+
+    def finish_compaction(self, data: Dict[str, Dict]):
+        pass
+
+    def close(self):
+        pass
+
+class JsonJournalStorage(StorageBackend):
+    """
+    基于快照+追加日志的沉默状态存储
+    - 快照: silence_restrictions.json，仍是 {聊天流ID: 记录} 的JSON对象，但每个键占一行，
+      记录中以 "components" 引用组件集合表并带有 "source"，不再内联 disabled_actions/disabled_commands
+    - 日志: silence_restrictions.journal，每次变更追加一行紧凑记录，当前状态是快照加上重放日志的结果
+    - 兼容性: 可以直接读取旧版本的快照，内联列表的记录在下一次刷写时改写为新格式；
+      写入后不能再退回旧版本（旧版本不读取日志，也无法解析集合引用）
+    - 组件集合表: silence_restrictions.sets.json
+    - 定时沉默规则: silence_restrictions.schedules.json
+    - 启动时以快照为基础重放日志；日志过长时在后台压缩为新的快照（原子替换）
+    - 记住已读到的日志位置，其他进程追加的记录只需从该位置增量重放
+    """
+
+    def __init__(self, snapshot_file: str, compact_threshold: int = 500):
+        self.snapshot_file = snapshot_file
+        base = os.path.splitext(snapshot_file)[0]
+        self.journal_file = base + ".journal"
+        # 压缩进行中被轮换出去的旧日志，压缩完成后删除
+        self.rotated_journal_file = base + ".journal.old"
+        self.component_sets_file = base + ".sets.json"
+        self.schedules_file = base + ".schedules.json"
+        self.compact_threshold = compact_threshold
+        self._journal: Optional[TextIO] = None
+        self._journal_records = 0
+        # 上次读取时看到的 (快照, 旧日志) 的文件标识，以及当前日志的inode与已读到的字节位置
+        self._view: Optional[tuple] = None
+        self._journal_ino: Optional[int] = None
+        self._journal_offset = 0
+        # 自己上一次追加后日志的大小
+        self._journal_tail: Optional[int] = None
+
+    def ensure(self):
+        """确保快照文件存在，如果不存在则创建"""
+        os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+        if not os.path.exists(self.snapshot_file):
+            self._write_snapshot({})
+            logger.info(f"已创建沉默配置文件: {self.snapshot_file}")
+
+    def signature(self) -> tuple:
+        """快照与日志的(mtime_ns, size)，用于发现进程外的修改"""
+        return (self._stat(self.snapshot_file), self._stat(self.journal_file))
+
+    @staticmethod
+    def _stat(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _identity(path: str) -> Optional[tuple]:
+        """(inode, mtime_ns, size)，文件被替换或修改时变化"""
+        try:
+            st = os.stat(path)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def load_all(self) -> Dict[str, Dict]:
+        """读取快照并依次重放旧日志与当前日志"""
+        self.ensure()
+        view = (self._identity(self.snapshot_file), self._identity(self.rotated_journal_file))
+        with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        changes: Dict[str, Optional[Dict]] = {}
+        rotated_records, _ = self._replay(self.rotated_journal_file, changes)
+        self._journal_ino, self._journal_offset = None, 0
+        self._journal_records = self._replay_journal(changes)
+        for stream_id, stream_data in changes.items():
+            if stream_data is None:
+                data.pop(stream_id, None)
+            else:
+                data[stream_id] = stream_data
+        self._journal_records += rotated_records
+        self._view = view
+        return data
+
+    def load_changes(self) -> Optional[Dict[str, Optional[Dict]]]:
+        """快照与旧日志都没有变化时，只重放当前日志中新追加的部分"""
+        if self._view != (self._identity(self.snapshot_file), self._identity(self.rotated_journal_file)):
+            return None
+        changes: Dict[str, Optional[Dict]] = {}
+        try:
+            self._journal_records += self._replay_journal(changes)
+        except ValueError:
+            return None
+        return changes
+
+    def _replay_journal(self, changes: Dict[str, Optional[Dict]]) -> int:
+        """从上次读到的位置继续重放当前日志；日志已被替换或截断时抛出ValueError"""
+        try:
+            f = open(self.journal_file, 'rb')
+        except FileNotFoundError:
+            if self._journal_ino is not None:
+                raise ValueError("日志已被轮换")
+            return 0
+        with f:
+            st = os.fstat(f.fileno())
+            if self._journal_ino is None:
+                self._journal_ino, self._journal_offset = st.st_ino, 0
+            elif st.st_ino != self._journal_ino or st.st_size < self._journal_offset:
+                raise ValueError("日志已被替换")
+            count, self._journal_offset = self._replay_from(f, self._journal_offset, changes, self.journal_file)
+        return count
+
+    @classmethod
+    def _replay(cls, path: str, changes: Dict[str, Optional[Dict]]) -> Tuple[int, int]:
+        """把整个日志文件中的记录收集到changes中，返回 (记录数, 读到的字节位置)"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return 0, 0
+        with f:
+            return cls._replay_from(f, 0, changes, path)
+
+    @staticmethod
+    def _replay_from(f, offset: int, changes: Dict[str, Optional[Dict]], path: str) -> Tuple[int, int]:
+        """从offset开始读取完整的行（另一个进程写了一半的最后一行留到下次），值为None表示删除"""
+        f.seek(offset)
+        count = 0
+        for raw_line in f:
+            if not raw_line.endswith(b"\n"):
+                break
+            offset += len(raw_line)
+            line = raw_line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 崩溃时可能留下损坏的行，忽略即可
+                logger.warning(f"跳过损坏的沉默日志记录: {path}")
+                continue
+
+            if record.get("op") == "put":
+                changes[record["id"]] = record["data"]
+            elif record.get("op") == "del":
+                changes[record["id"]] = None
+            count += 1
+        return count, offset
+
+    def apply_batch(self, changes: Dict[str, Optional[Dict]]):
+        """一批变更合并成一次写入"""
+        self._append_many([
+            {"op": "del", "id": stream_id} if stream_data is None else {"op": "put", "id": stream_id, "data": stream_data}
+            for stream_id, stream_data in changes.items()
+        ])
+
+    def _append_many(self, records: List[Dict]):
+        # 日志可能已被其他进程轮换，此时打开的句柄指向旧文件，需要重新打开
+        journal_ino = self._identity(self.journal_file)
+        if self._journal is not None and (journal_ino is None or os.fstat(self._journal.fileno()).st_ino != journal_ino[0]):
+            self.close()
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        st = os.fstat(self._journal.fileno())
+        # 崩溃可能留下没有换行的半行，先补上换行，否则新记录会接在它后面、一起被当作损坏的行跳过；
+        # 日志末尾就是自己上次写完的位置时不需要检查
+        torn = st.st_size not in (0, self._journal_tail) and not self._ends_with_newline(self.journal_file, st.st_size)
+        self._journal.write(("\n" if torn else "") + "".join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n" for record in records
+        ))
+        self._journal.flush()
+        self._journal_tail = os.fstat(self._journal.fileno()).st_size
+        self._journal_records += len(records)
+        # 在此之前的内容都已读过时，自己写入的记录不需要再重放
+        if self._journal_ino in (None, st.st_ino) and self._journal_offset == st.st_size:
+            self._journal_ino = st.st_ino
+            self._journal_offset = os.fstat(self._journal.fileno()).st_size
+
+    @staticmethod
+    def _ends_with_newline(path: str, size: int) -> bool:
+        with open(path, 'rb') as f:
+            f.seek(size - 1)
+            return f.read(1) == b"\n"
+
+    def needs_compaction(self) -> bool:
+        return (
+            self._journal_records >= self.compact_threshold
+            and not os.path.exists(self.rotated_journal_file)
+        )
+
+    def begin_compaction(self) -> bool:
+        """
+        轮换日志，之后的变更写入新日志
+        必须在与put/delete相同的线程中调用；返回False表示已有压缩在进行
+        """
+        if os.path.exists(self.rotated_journal_file):
+            return False
+        self.close()
+        if os.path.exists(self.journal_file):
+            os.replace(self.journal_file, self.rotated_journal_file)
+        self._journal_records = 0
+        return True
+
+    def finish_compaction(self, data: Dict[str, Dict]):
+        """把轮换前的完整状态写成新快照并删除旧日志，可在后台线程中执行"""
+        self._write_snapshot(data)
+        if os.path.exists(self.rotated_journal_file):
+            os.remove(self.rotated_journal_file)
+        # 新快照就是自己写的内容，之后只需从新日志的开头增量读取
+        self._view = (self._identity(self.snapshot_file), None)
+        self._journal_ino, self._journal_offset = None, 0
+
+    def _write_snapshot(self, data: Dict[str, Dict]):
+        _write_json_file(self.snapshot_file, data)
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._journal_tail = None
+
+class SqliteStorage(StorageBackend):
+    """
+    基于标准库sqlite3的沉默状态存储
+    - 以stream_id为主键，到期调度由SilenceCore的内存堆负责，不需要按到期时间查询
+    - 每次刷写的一批变更在同一个事务中提交
+    - 首次启动时自动从旧的silence_restrictions.json（含日志）迁移
+    """
+
+    def __init__(self, db_file: str, legacy_json_file: Optional[str] = None):
+        self.db_file = db_file
+        self.legacy_json_file = legacy_json_file
+        self._conn: Optional[sqlite3.Connection] = None
+        # 连接可能被后台线程使用，所有访问都串行化
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        if self._conn is not None:
+            return
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS silence ("
+                "stream_id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS component_sets ("
+                "set_id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS schedules ("
+                "stream_id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL)"
+            )
+        self._migrate_legacy_json()
+
+    def _migrate_legacy_json(self):
+        """数据库为空且存在旧JSON文件时，一次性导入并把旧文件改名保留"""
+        if not self.legacy_json_file or not os.path.exists(self.legacy_json_file):
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM silence LIMIT 1").fetchone() is not None:
+                return
+
+        legacy = JsonJournalStorage(self.legacy_json_file)
+        data = legacy.load_all()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO silence (stream_id, data) VALUES (?, ?)",
+                [self._row(stream_id, stream_data) for stream_id, stream_data in data.items()],
+            )
+        self._migrate_legacy_tables(legacy)
+        for path in (legacy.snapshot_file, legacy.journal_file, legacy.rotated_journal_file):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+        logger.info(f"已将 {len(data)} 条沉默状态从 {self.legacy_json_file} 迁移到 {self.db_file}")
+
+    @staticmethod
+    def _row(stream_id: str, stream_data: Dict) -> tuple:
+        return (stream_id, json.dumps(stream_data, ensure_ascii=False, separators=(',', ':')))
+
+    def signature(self) -> Any:
+        # data_version只会因为其他连接（包括其他进程）的提交而变化
+        with self._lock:
+            if self._conn is None:
+                # 已关闭（例如退出时的最后一次刷写）
+                return None
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load_all(self) -> Dict[str, Dict]:
+        self.ensure()
+        with self._lock:
+            rows = self._conn.execute("SELECT stream_id, data FROM silence").fetchall()
+        return {stream_id: json.loads(data) for stream_id, data in rows}
+
+    def apply_batch(self, changes: Dict[str, Optional[Dict]]):
+        """一批变更在同一个事务中提交"""
+        upserts = [self._row(stream_id, stream_data) for stream_id, stream_data in changes.items() if stream_data is not None]
+        deletes = [(stream_id,) for stream_id, stream_data in changes.items() if stream_data is None]
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO silence (stream_id, data) VALUES (?, ?)", upserts
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM silence WHERE stream_id = ?", deletes)
+
+    def load_component_sets(self) -> Dict[str, Dict]:
+        self.ensure()
+        with self._lock:
+            rows = self._conn.execute("SELECT set_id, data FROM component_sets").fetchall()
+        return {set_id: json.loads(data) for set_id, data in rows}
+
+    def save_component_sets(self, added: Dict[str, Dict], removed: Set[str]):
+        with self._lock, self._conn:
+            if added:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO component_sets (set_id, data) VALUES (?, ?)",
+                    [(set_id, json.dumps(entry, ensure_ascii=False, separators=(',', ':'))) for set_id, entry in added.items()],
+                )
+            if removed:
+                self._conn.executemany("DELETE FROM component_sets WHERE set_id = ?", [(set_id,) for set_id in removed])
+
+    def load_schedules(self) -> Dict[str, Dict]:
+        self.ensure()
+        with self._lock:
+            rows = self._conn.execute("SELECT stream_id, data FROM schedules").fetchall()
+        return {stream_id: json.loads(data) for stream_id, data in rows}
+
+    def save_schedules(self, changes: Dict[str, Optional[Dict]]):
+        upserts = [
+            (stream_id, json.dumps(rule, ensure_ascii=False, separators=(',', ':')))
+            for stream_id, rule in changes.items() if rule is not None
+        ]
+        deletes = [(stream_id,) for stream_id, rule in changes.items() if rule is None]
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany("INSERT OR REPLACE INTO schedules (stream_id, data) VALUES (?, ?)", upserts)
+            if deletes:
+                self._conn.executemany("DELETE FROM schedules WHERE stream_id = ?", deletes)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class ShardedStorage(StorageBackend):
+    """
+    按聊天流ID哈希分桶的沉默状态存储
+    - 目录下每个桶一个小JSON文件，一次变更只重写它所在的桶
+    - index.json记录每个桶的版本号与条目数：进程外修改时只重新读取版本变化的桶，空桶不需要打开
+    - 记住调用方已经看到的各桶版本，load_changes只报告版本变化的桶中的差异
+    - 首次启动时自动从旧的silence_restrictions.json（含日志）迁移
+    """
+
+    def __init__(self, shard_dir: str, legacy_json_file: Optional[str] = None, bucket_count: int = 64):
+        self.shard_dir = shard_dir
+        self.index_file = os.path.join(shard_dir, "index.json")
+        self.component_sets_file = os.path.join(shard_dir, "component_sets.json")
+        self.schedules_file = os.path.join(shard_dir, "schedules.json")
+        self.legacy_json_file = legacy_json_file
+        self.bucket_count = bucket_count
+        # 桶编号 -> {"version", "count"}
+        self._index: Dict[str, Dict] = {}
+        # 已读入内存的桶及其版本号，版本未变时不再读盘
+        self._buckets: Dict[str, Dict[str, Dict]] = {}
+        self._bucket_versions: Dict[str, int] = {}
+        # 调用方（通过load_all/load_changes/apply_batch）已经看到的各桶版本及其中的聊天流ID
+        self._seen_versions: Dict[str, int] = {}
+        self._seen_ids: Dict[str, Set[str]] = {}
+
+    def ensure(self):
+        os.makedirs(self.shard_dir, exist_ok=True)
+        if os.path.exists(self.index_file):
+            self._read_index()
+            return
+        # 索引最后原子写入：迁移中途崩溃时还没有索引，下次启动会重新迁移
+        self._migrate_legacy_json()
+        self._write_index()
+
+    def _migrate_legacy_json(self):
+        """存在旧JSON文件时一次性导入，写入索引后再把旧文件改名保留"""
+        if not self.legacy_json_file or not os.path.exists(self.legacy_json_file):
+            return
+        legacy = JsonJournalStorage(self.legacy_json_file)
+        data = legacy.load_all()
+        self._migrate_legacy_tables(legacy)
+        self._write_buckets(data)
+        self._write_index()
+        for path in (legacy.snapshot_file, legacy.journal_file, legacy.rotated_journal_file):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+        logger.info(f"已将 {len(data)} 条沉默状态从 {self.legacy_json_file} 迁移到 {self.shard_dir}")
+
+    def _bucket_of(self, stream_id: str) -> str:
+        # crc32在不同进程、不同Python版本间保持稳定（内置hash不是）
+        return f"{zlib.crc32(stream_id.encode('utf-8')) % self.bucket_count:03d}"
+
+    def _bucket_file(self, bucket: str) -> str:
+        return os.path.join(self.shard_dir, f"bucket_{bucket}.json")
+
+    def _read_index(self):
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.bucket_count = index.get("bucket_count", self.bucket_count)
+        self._index = index.get("buckets", {})
+
+    def _write_index(self):
+        _write_json_file(self.index_file, {"bucket_count": self.bucket_count, "buckets": self._index})
+
+    def _load_bucket(self, bucket: str) -> Dict[str, Dict]:
+        """读取一个桶，版本号与缓存一致时直接使用缓存"""
+        version = self._index.get(bucket, {}).get("version")
+        if version is None:
+            return {}
+        if self._bucket_versions.get(bucket) != version:
+            try:
+                with open(self._bucket_file(bucket), 'r', encoding='utf-8') as f:
+                    self._buckets[bucket] = json.load(f)
+            except FileNotFoundError:
+                self._buckets[bucket] = {}
+            self._bucket_versions[bucket] = version
+        return self._buckets[bucket]
+
+    def signature(self) -> Optional[tuple]:
+        # 每次变更都会重写index.json，它的(mtime_ns, size)足以发现进程外的修改
+        return JsonJournalStorage._stat(self.index_file)
+
+    def load_all(self) -> Dict[str, Dict]:
+        self._read_index()
+        data = {}
+        self._seen_versions, self._seen_ids = {}, {}
+        for bucket, info in self._index.items():
+            entries = self._load_bucket(bucket) if info.get("count") else {}
+            data.update(entries)
+            self._seen_versions[bucket] = info.get("version")
+            self._seen_ids[bucket] = set(entries)
+        return data
+
+    def load_changes(self) -> Optional[Dict[str, Optional[Dict]]]:
+        """只读取版本变化的桶：桶中现有的条目全部报告，已不在桶中的报告为删除"""
+        self._read_index()
+        changes: Dict[str, Optional[Dict]] = {}
+        for bucket, info in self._index.items():
+            if self._seen_versions.get(bucket) == info.get("version"):
+                continue
+            entries = self._load_bucket(bucket)
+            for stream_id in self._seen_ids.get(bucket, set()) - entries.keys():
+                changes[stream_id] = None
+            changes.update(entries)
+            self._seen_versions[bucket] = info.get("version")
+            self._seen_ids[bucket] = set(entries)
+        return changes
+
+    def apply_batch(self, changes: Dict[str, Optional[Dict]]):
+        """按桶分组，每个受影响的桶重写一次，最后更新一次索引"""
+        self._write_buckets(changes)
+        self._write_index()
+
+    def _write_buckets(self, changes: Dict[str, Optional[Dict]]):
+        """重写受影响的桶并更新内存中的索引，索引文件由调用方写入"""
+        grouped: Dict[str, Dict[str, Optional[Dict]]] = {}
+        for stream_id, stream_data in changes.items():
+            grouped.setdefault(self._bucket_of(stream_id), {})[stream_id] = stream_data
+
+        for bucket, bucket_changes in grouped.items():
+            entries = dict(self._load_bucket(bucket))
+            for stream_id, stream_data in bucket_changes.items():
+                if stream_data is None:
+                    entries.pop(stream_id, None)
+                else:
+                    entries[stream_id] = stream_data
+
+            # 桶清空后也保留索引条目，版本号始终递增，其他读者的缓存不会误判为未变化
+            previous_version = self._index.get(bucket, {}).get("version")
+            version = (previous_version or 0) + 1
+            if entries:
+                _write_json_file(self._bucket_file(bucket), entries)
+            elif os.path.exists(self._bucket_file(bucket)):
+                os.remove(self._bucket_file(bucket))
+            self._index[bucket] = {"version": version, "count": len(entries)}
+            self._buckets[bucket] = entries
+            self._bucket_versions[bucket] = version
+            # 写入前的版本已经被调用方看到时，自己的写入不需要再报告
+            if self._seen_versions.get(bucket) == previous_version:
+                self._seen_versions[bucket] = version
+                self._seen_ids[bucket] = set(entries)
+
+def create_storage(backend: str, json_file: str) -> StorageBackend:
+    """
+    根据配置创建存储后端
+    - "json"（默认）: silence_restrictions.json + 追加日志
+    - "sqlite": 同目录下的silence_restrictions.db，首次启动时自动迁移旧JSON数据
+    - "sharded": 同目录下的silence_restrictions.shards/，按聊天流分桶，首次启动时自动迁移旧JSON数据
+    """
+    if backend == "sqlite":
+        db_file = os.path.splitext(json_file)[0] + ".db"
+        return SqliteStorage(db_file, legacy_json_file=json_file)
+    if backend == "sharded":
+        shard_dir = os.path.splitext(json_file)[0] + ".shards"
+        return ShardedStorage(shard_dir, legacy_json_file=json_file)
+    if backend != "json":
+        logger.warning(f"未知的存储后端 {backend}，使用默认的json后端")
+    return JsonJournalStorage(json_file)
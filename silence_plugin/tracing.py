@@ -0,0 +1,148 @@
+import asyncio
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from typing import Any, Dict, Optional
+from src.common.logger import get_logger
+from plugins.silence_plugin.metrics import SilenceMetrics
+
+logger = get_logger("Silence")
+
+# 当前所在的span，用于记录父子关系（每个asyncio任务各自独立）
+_current_span: contextvars.ContextVar[Optional["_Span"]] = contextvars.ContextVar("silence_current_span", default=None)
+_span_ids = itertools.count(1)
+
+class _NoopSpan:
+    """未开启追踪时使用的空span，没有任何开销"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    __slots__ = ("name", "stream_id", "attrs", "span_id", "parent", "trace_id", "start", "wall_start", "token")
+
+    def __init__(self, name: str, stream_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.stream_id = stream_id
+        self.attrs = attrs
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.span_id = next(_span_ids)
+        self.parent = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        if self.stream_id is None and parent is not None:
+            self.stream_id = parent.stream_id
+        self.wall_start = time.time()
+        self.start = time.monotonic()
+        self.token = _current_span.set(self)
+        return self
+
+    def set(self, **attrs):
+        """补充span的属性（例如操作结果）"""
+        self.attrs.update(attrs)
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.monotonic()
+        _current_span.reset(self.token)
+        record = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent,
+            "phase": self.name,
+            "stream_id": self.stream_id,
+            "ts": self.wall_start,
+            "start": self.start,
+            "end": end,
+            "duration_ms": (end - self.start) * 1000,
+            "status": "ok" if exc_type is None else ("cancelled" if issubclass(exc_type, asyncio.CancelledError) else "error"),
+        }
+        if self.attrs:
+            record.update(self.attrs)
+        SilenceTracer._emit(record)
+        return False
+
+class SilenceTracer:
+    """
+    可选的逐操作追踪
+    - 每个span记录聊天流ID、阶段名以及单调时钟的起止时间，嵌套的span通过trace/parent关联
+    - span结束时只把记录放入有界队列，由后台线程写入按大小轮转的JSONL文件；队列满时丢弃并计数
+    - 未开启时span()返回空对象，不产生任何开销
+    """
+
+    _enabled: bool = False
+    _queue: Optional[queue.Queue] = None
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _atexit_registered: bool = False
+
+    @classmethod
+    def configure(cls, enabled: bool, trace_file: str, max_bytes: int = 1024 * 1024,
+                  backup_count: int = 3, queue_size: int = 10000):
+        cls.shutdown()
+        if not enabled:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(trace_file) or ".", exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                trace_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+        except Exception as e:
+            logger.error(f"无法打开追踪文件 {trace_file}，追踪未开启: {str(e)}")
+            return
+
+        cls._queue = queue.Queue(maxsize=queue_size)
+        cls._listener = logging.handlers.QueueListener(cls._queue, handler)
+        cls._listener.start()
+        cls._enabled = True
+        if not cls._atexit_registered:
+            atexit.register(cls.shutdown)
+            cls._atexit_registered = True
+        logger.info(f"沉默操作追踪已开启，写入: {trace_file}")
+
+    @classmethod
+    def span(cls, phase: str, stream_id: Optional[str] = None, **attrs):
+        """with SilenceTracer.span("add_silence", stream_id): ... 记录一个阶段"""
+        if not cls._enabled:
+            return _NOOP_SPAN
+        return _Span(phase, stream_id, attrs)
+
+    @classmethod
+    def _emit(cls, record: Dict[str, Any]):
+        # 刷写线程中的span可能与shutdown并发，先取出队列的引用
+        record_queue = cls._queue
+        if not cls._enabled or record_queue is None:
+            return
+        log_record = logging.makeLogRecord({"msg": json.dumps(record, ensure_ascii=False, separators=(',', ':'))})
+        try:
+            record_queue.put_nowait(log_record)
+        except queue.Full:
+            SilenceMetrics.incr("trace.dropped")
+
+    @classmethod
+    def shutdown(cls):
+        """停止后台写入线程并写完队列中剩余的记录"""
+        cls._enabled = False
+        if cls._listener is not None:
+            cls._listener.stop()
+            for handler in cls._listener.handlers:
+                handler.close()
+            cls._listener = None
+        cls._queue = None
@@ -0,0 +1,49 @@
+"""
+回归测试，无需启动麦麦
+
+在仓库根目录执行:
+    python -m pytest -q tests
+
+与基准测试相同，宿主模块由 benchmarks/host_stubs 替代
+"""
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TESTS_DIR)
+
+# 插件以 plugins.silence_plugin 的路径导入自身模块，宿主模块由host_stubs替代
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks", "host_stubs"))
+if "plugins" not in sys.modules:
+    plugins_package = types.ModuleType("plugins")
+    plugins_package.__path__ = [REPO_ROOT]
+    sys.modules["plugins"] = plugins_package
+
+from plugins.silence_plugin.silence_core import SilenceCore  # noqa: E402
+from plugins.silence_plugin.component_sets import ComponentSets  # noqa: E402
+
+@pytest.fixture
+def silence_core(tmp_path):
+    """使用临时目录中全新存储的SilenceCore，测试结束后写盘并关闭"""
+    SilenceCore._data, SilenceCore._pending = {}, {}
+    SilenceCore._flush_task = None
+    ComponentSets.reset()
+    SilenceCore.init(str(tmp_path / "silence_restrictions.json"), flush_delay=0.01)
+    yield SilenceCore
+    SilenceCore.flush()
+    SilenceCore._storage.close()
+
+def run_other_process(code: str):
+    """在另一个进程中执行一段代码，宿主模块同样由host_stubs替代"""
+    bootstrap = (
+        "import sys, types\n"
+        f"sys.path.insert(0, {os.path.join(REPO_ROOT, 'benchmarks', 'host_stubs')!r})\n"
+        "plugins_package = types.ModuleType('plugins')\n"
+        f"plugins_package.__path__ = [{REPO_ROOT!r}]\n"
+        "sys.modules['plugins'] = plugins_package\n"
+    )
+    subprocess.run([sys.executable, "-c", bootstrap + code], check=True, timeout=60)
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from plugins.silence_plugin.announcer import ReplyPool, SilenceAnnouncer
+from plugins.silence_plugin.metrics import SilenceMetrics
+from src.plugin_system.apis import generator_api, send_api
+
+@pytest.fixture
+def announcer(monkeypatch):
+    """不限速、不检查聊天流状态的回复队列"""
+    monkeypatch.setattr(generator_api, "delay", 0.01)
+    monkeypatch.setattr(SilenceAnnouncer, "_is_silenced", None)
+    monkeypatch.setattr(ReplyPool, "_pools", {})
+    SilenceAnnouncer.configure(timeout=1.0, concurrency=2, rate=0)
+    ReplyPool.configure(pool_size=0, ttl=1800)
+    yield SilenceAnnouncer
+    SilenceAnnouncer.configure(timeout=10.0)
+    ReplyPool.configure(pool_size=1, ttl=1800)
+
+def test_join_returns_after_all_replies_are_sent(announcer):
+    async def main():
+        sent = send_api.sent
+        announcer.announce_many("command_mute", [(None, f"s{i}") for i in range(5)])
+        await asyncio.wait_for(announcer.join(), 5)
+        assert send_api.sent - sent == 5
+        assert not announcer._busy()
+        # 没有待处理的回复时立即返回
+        await asyncio.wait_for(announcer.join(), 0.1)
+
+    asyncio.run(main())
+
+def test_queued_replies_for_one_stream_are_coalesced(announcer):
+    async def main():
+        sent = send_api.sent
+        announcer.announce("command_mute", None, "s")
+        announcer.announce("command_unmute", None, "s")
+        await asyncio.wait_for(announcer.join(), 5)
+        assert send_api.sent - sent == 1
+
+    asyncio.run(main())
+
+def test_prefilled_unmute_reply_is_shared_across_streams(announcer):
+    """命令沉默后预生成的解除沉默回复可以被另一个聊天流直接使用"""
+    ReplyPool.configure(pool_size=1, ttl=1800)
+
+    async def main():
+        announcer.announce("command_mute", None, "a")
+        await asyncio.wait_for(announcer.join(), 5)
+        assert len(ReplyPool._pools["command_unmute"]) == 1
+
+        hits = SilenceMetrics._counters.get("reply_pool.hit", 0)
+        announcer.announce("command_unmute", None, "b")
+        await asyncio.wait_for(announcer.join(), 5)
+        assert SilenceMetrics._counters.get("reply_pool.hit", 0) == hits + 1
+        assert ReplyPool._pools["command_unmute"] == []
+
+    asyncio.run(main())
+
+def test_expired_pool_entries_are_not_used(announcer):
+    ReplyPool.configure(pool_size=1, ttl=1)
+    ReplyPool._pools["command_unmute"] = [(0.0, [("text", "过期的回复")])]
+    assert ReplyPool.take("command_unmute") is None
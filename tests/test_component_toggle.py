@@ -0,0 +1,46 @@
+import asyncio
+import inspect
+
+from plugins.silence_plugin.component_toggle import ComponentToggle
+
+SNAPSHOT = (("reply",), ())
+
+def test_sync_mutator_invalidates_snapshot():
+    def register_component(registry, name):
+        return name
+    wrapped = ComponentToggle._wrap_mutator(register_component)
+
+    ComponentToggle._snapshot = SNAPSHOT
+    assert wrapped(None, "reply") == "reply"
+    assert ComponentToggle._snapshot is None
+    assert wrapped.__name__ == "register_component"
+
+def test_async_mutator_invalidates_after_await():
+    """协程方法在真正修改完注册表之后才让快照失效，期间缓存的快照不会留下"""
+    async def enable_component(registry, name):
+        await asyncio.sleep(0)
+        # 修改过程中有人查询并缓存了快照
+        ComponentToggle._snapshot = SNAPSHOT
+        return True
+    wrapped = ComponentToggle._wrap_mutator(enable_component)
+    assert inspect.iscoroutinefunction(wrapped)
+
+    ComponentToggle._snapshot = SNAPSHOT
+    assert asyncio.run(wrapped(None, "reply")) is True
+    assert ComponentToggle._snapshot is None
+
+def test_disable_and_enable_only_touch_differences(monkeypatch):
+    from src.plugin_system.apis import component_manage_api
+    calls = []
+    monkeypatch.setattr(component_manage_api, "locally_disable_component", lambda name, *_: calls.append(("disable", name)))
+    monkeypatch.setattr(component_manage_api, "locally_enable_component", lambda name, *_: calls.append(("enable", name)))
+
+    ComponentToggle.disable("s", ["reply", "emoji"], [])
+    calls.clear()
+    assert ComponentToggle.disable("s", ["reply"], []) == (0, 0)
+    assert calls == [("enable", "emoji")]
+
+    calls.clear()
+    ComponentToggle.enable("s", ["reply", "emoji"], [])
+    assert sorted(calls) == [("disable", "silence_stop_action"), ("enable", "reply")]
+    assert "s" not in ComponentToggle._applied
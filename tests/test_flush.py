@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+from plugins.silence_plugin.storage import JsonJournalStorage
+
+RECORD = {"expiration": None, "components": None, "source": "command"}
+
+def test_change_during_flush_is_persisted(silence_core):
+    """刷写在线程池中写盘时产生的变更，由同一个刷写任务在之后写入"""
+    storage = silence_core._storage
+    original_apply_batch = storage.apply_batch
+    writing, release = threading.Event(), threading.Event()
+
+    def slow_apply_batch(changes):
+        writing.set()
+        release.wait(5)
+        original_apply_batch(changes)
+    storage.apply_batch = slow_apply_batch
+
+    async def main():
+        silence_core._put("a", RECORD)
+        assert await asyncio.get_running_loop().run_in_executor(None, writing.wait, 5)
+        silence_core._put("b", RECORD)
+        release.set()
+        await asyncio.wait_for(silence_core._flush_task, 5)
+
+    asyncio.run(main())
+    assert silence_core._pending == {}
+    assert set(JsonJournalStorage(storage.snapshot_file).load_all()) == {"a", "b"}
+
+def test_local_flush_keeps_outside_journal_write(silence_core):
+    """单进程模式下，本地写盘前先读入进程外追加到日志中的记录"""
+    outside = JsonJournalStorage(silence_core._storage.snapshot_file)
+    outside.load_all()
+    outside.apply_batch({"external": RECORD})
+    outside.close()
+
+    silence_core._put("local", RECORD)
+    silence_core._last_check = 0.0
+    assert silence_core.is_silenced("external")
+    assert silence_core.is_silenced("local")
+
+def test_failed_sync_flush_raises(silence_core):
+    """sync模式下写盘失败不能被当作已持久化，变更保留在队列中"""
+    silence_core._durability = "sync"
+
+    def failing_apply_batch(changes):
+        raise OSError("磁盘已满")
+    silence_core._storage.apply_batch = failing_apply_batch
+
+    async def main():
+        silence_core._put("a", RECORD)
+        try:
+            await silence_core._persist()
+        except OSError:
+            return True
+        return False
+
+    try:
+        assert asyncio.run(main())
+        assert "a" in silence_core._pending
+    finally:
+        silence_core._durability = "delayed"
+        del silence_core._storage.apply_batch
@@ -0,0 +1,43 @@
+import pytest
+
+# plugin.py 依赖 toml
+pytest.importorskip("toml")
+
+from plugins.silence_plugin import plugin  # noqa: E402
+from src.config.official_configs import ChatConfig  # noqa: E402
+
+SILENCED = {"s": {"expiration": None, "components": None}}
+
+@pytest.fixture
+def original_talk_frequency():
+    original = ChatConfig.talk_frequency
+    yield original
+    plugin._on_silence_changed({}, float("inf"))
+    ChatConfig.talk_frequency = original
+    plugin._patch_installed = False
+
+def test_patch_only_while_silenced(original_talk_frequency):
+    plugin._on_silence_changed(SILENCED, float("inf"))
+    assert ChatConfig().talk_frequency("s") < 0.001
+    assert ChatConfig().talk_frequency("other") == 1.0
+
+    plugin._on_silence_changed({}, float("inf"))
+    assert ChatConfig.talk_frequency is original_talk_frequency
+
+def test_foreign_wrapper_over_patch_does_not_recurse(original_talk_frequency):
+    """其他插件在补丁外再包一层后，沉默集合清空又重新非空不会让补丁包住自己"""
+    plugin._on_silence_changed(SILENCED, float("inf"))
+    wrapped = ChatConfig.talk_frequency
+
+    def foreign_wrapper(self, chat_stream_id=None):
+        return wrapped(self, chat_stream_id)
+    ChatConfig.talk_frequency = foreign_wrapper
+
+    plugin._on_silence_changed({}, float("inf"))
+    assert ChatConfig.talk_frequency is foreign_wrapper
+    assert ChatConfig().talk_frequency("s") == 1.0
+
+    plugin._on_silence_changed(SILENCED, float("inf"))
+    assert ChatConfig.talk_frequency is foreign_wrapper
+    assert ChatConfig().talk_frequency("s") < 0.001
+    assert ChatConfig().talk_frequency("other") == 1.0
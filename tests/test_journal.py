@@ -0,0 +1,52 @@
+import json
+
+from plugins.silence_plugin.storage import JsonJournalStorage
+
+RECORD = {"expiration": None, "components": None, "source": "command"}
+
+def _storage(tmp_path) -> JsonJournalStorage:
+    storage = JsonJournalStorage(str(tmp_path / "silence_restrictions.json"))
+    storage.ensure()
+    return storage
+
+def test_snapshot_and_journal_replay(tmp_path):
+    storage = _storage(tmp_path)
+    storage.apply_batch({"a": RECORD, "b": RECORD})
+    storage.apply_batch({"a": None})
+    storage.close()
+    assert _storage(tmp_path).load_all() == {"b": RECORD}
+
+def test_append_after_torn_line(tmp_path):
+    """崩溃留下的半行不会吞掉之后追加的记录"""
+    storage = _storage(tmp_path)
+    storage.apply_batch({"a": RECORD})
+    storage.close()
+    with open(storage.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"op":"put","id":"torn","da')
+
+    storage = _storage(tmp_path)
+    assert set(storage.load_all()) == {"a"}
+    storage.apply_batch({"b": RECORD})
+    storage.close()
+    assert set(_storage(tmp_path).load_all()) == {"a", "b"}
+
+def test_incremental_changes_skip_own_writes(tmp_path):
+    storage, other = _storage(tmp_path), _storage(tmp_path)
+    storage.load_all()
+    other.load_all()
+    storage.apply_batch({"a": RECORD})
+    other.apply_batch({"b": RECORD})
+    assert storage.load_changes() == {"b": RECORD}
+    assert storage.load_changes() == {}
+
+def test_compaction_keeps_state(tmp_path):
+    storage = _storage(tmp_path)
+    storage.compact_threshold = 3
+    storage.apply_batch({f"s{i}": RECORD for i in range(3)})
+    assert storage.needs_compaction() and storage.begin_compaction()
+    storage.apply_batch({"late": RECORD})
+    storage.finish_compaction({f"s{i}": RECORD for i in range(3)})
+    storage.close()
+    with open(storage.snapshot_file, encoding="utf-8") as f:
+        assert set(json.load(f)) == {"s0", "s1", "s2"}
+    assert set(_storage(tmp_path).load_all()) == {"s0", "s1", "s2", "late"}
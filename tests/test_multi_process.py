@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import run_other_process
+from plugins.silence_plugin.component_sets import ComponentSets
+from plugins.silence_plugin.silence_core import SilenceCore
+
+RECORD = {"expiration": None, "components": None, "source": "command"}
+NEWER = {"expiration": None, "components": None, "source": "action"}
+
+@pytest.fixture(params=["json", "sqlite", "sharded"])
+def shared_core(request, tmp_path):
+    """多进程模式的SilenceCore，另一个进程通过 other(代码) 以相同配置操作同一份存储"""
+    config_file = str(tmp_path / "silence_restrictions.json")
+    backend = request.param
+    SilenceCore._data, SilenceCore._pending = {}, {}
+    SilenceCore._flush_task = None
+    ComponentSets.reset()
+    SilenceCore.init(config_file, backend=backend, flush_delay=0.01, multi_process=True)
+
+    def other(code: str):
+        run_other_process(
+            "from plugins.silence_plugin.silence_core import SilenceCore\n"
+            f"SilenceCore.init({config_file!r}, backend={backend!r}, multi_process=True)\n"
+            + code + "\nSilenceCore.flush()\n"
+        )
+
+    yield SilenceCore, other
+    SilenceCore.flush()
+    SilenceCore._storage.close()
+    SilenceCore._process_lock.close()
+    SilenceCore._process_lock = None
+
+def _sync(core):
+    core._last_check = 0.0
+    core._refresh_if_changed()
+
+def test_sees_changes_of_other_process(shared_core):
+    core, other = shared_core
+    other(f"SilenceCore._put('x', {RECORD!r})")
+    _sync(core)
+    assert core._data == {"x": RECORD}
+
+    other("SilenceCore._delete('x')")
+    _sync(core)
+    assert core._data == {}
+
+def test_local_write_supersedes_staged_external_change(shared_core):
+    """写盘前暂存的其他进程的修改比随后写入的本地变更旧，不能在之后覆盖它"""
+    core, other = shared_core
+    core._put("x", RECORD)
+    other("SilenceCore._delete('x')")
+    # 没有事件循环时同步写盘：先暂存其他进程的删除，再写入本地的新值
+    core._put("x", NEWER)
+    _sync(core)
+    assert core._data == {"x": NEWER}
+    assert core._storage.load_all() == {"x": NEWER}
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from plugins.silence_plugin.deadline_loop import run_deadline_loop
+from plugins.silence_plugin.schedules import SilenceSchedules, parse_schedule, window_at
+
+# 2024-01-01 是周一，时间均按本地时区计算
+def _at(day: int, hour: int, minute: int = 0) -> float:
+    return datetime(2024, 1, day, hour, minute).timestamp()
+
+def test_parse_schedule():
+    assert parse_schedule("23:00-07:00") == {"start": 23 * 60, "end": 7 * 60, "days": [0, 1, 2, 3, 4, 5, 6]}
+    assert parse_schedule("09:00-17:30", "weekdays")["days"] == [0, 1, 2, 3, 4]
+    assert parse_schedule("09:00-17:30", "7,1,3,1")["days"] == [0, 2, 6]
+    assert parse_schedule("20:00-24:00")["end"] == 24 * 60
+
+@pytest.mark.parametrize("window, days", [
+    ("08:00", None),
+    ("8-9", None),
+    ("25:00-01:00", None),
+    ("08:60-09:00", None),
+    ("24:01-01:00", None),
+    ("08:00-08:00", None),
+    ("00:00-24:00", None),
+    ("08:00-09:00", "daily,weekends"),
+    ("08:00-09:00", "0"),
+    ("08:00-09:00", "8"),
+    ("08:00-09:00", "mon"),
+])
+def test_parse_schedule_rejects_bad_input(window, days):
+    with pytest.raises(ValueError):
+        parse_schedule(window, days)
+
+def test_window_crossing_midnight():
+    rule = parse_schedule("23:00-07:00")
+    # 凌晨仍处于昨晚开始的时段中
+    assert window_at(rule, _at(2, 2)) == (_at(1, 23), _at(2, 7))
+    # 时段结束后是当晚的下一个时段
+    assert window_at(rule, _at(2, 7)) == (_at(2, 23), _at(3, 7))
+
+def test_window_on_specific_weekdays():
+    wednesday = parse_schedule("09:00-17:00", "3")
+    assert window_at(wednesday, _at(1, 10)) == (_at(3, 9), _at(3, 17))
+    assert window_at(wednesday, _at(3, 16)) == (_at(3, 9), _at(3, 17))
+    assert window_at(wednesday, _at(3, 17)) == (_at(10, 9), _at(10, 17))
+
+    # 跨午夜的时段按开始的那天计算星期
+    monday_night = parse_schedule("23:00-07:00", "1")
+    assert window_at(monday_night, _at(2, 2)) == (_at(1, 23), _at(2, 7))
+    assert window_at(monday_night, _at(2, 8)) == (_at(8, 23), _at(9, 7))
+
+def test_window_without_days_is_rejected():
+    with pytest.raises(ValueError):
+        window_at({"start": 0, "end": 60, "days": []}, _at(1, 0))
+
+@pytest.fixture
+def schedules(monkeypatch):
+    monkeypatch.setattr(SilenceSchedules, "_rules", {})
+    monkeypatch.setattr(SilenceSchedules, "_heap", [])
+    monkeypatch.setattr(SilenceSchedules, "_next_start", {})
+    monkeypatch.setattr(SilenceSchedules, "_wakeup", None)
+    return SilenceSchedules
+
+def test_plan_starts_current_window_immediately(schedules):
+    schedules._rules["s"] = {**parse_schedule("23:00-07:00"), "applied": None}
+    now = _at(2, 2)
+    schedules._plan("s", now)
+    assert schedules._next_start["s"] == now
+
+def test_plan_skips_applied_window(schedules):
+    """当前时段已经应用过（例如被艾特解除）时等到下一个时段"""
+    schedules._rules["s"] = {**parse_schedule("23:00-07:00"), "applied": _at(1, 23)}
+    schedules._plan("s", _at(2, 2))
+    assert schedules._next_start["s"] == _at(2, 23)
+
+    # 上一个时段的applied不影响之后的时段
+    schedules._plan("s", _at(2, 23, 30))
+    assert schedules._next_start["s"] == _at(2, 23, 30)
+
+def test_deadline_loop_fires_due_entries_and_sleeps_until_woken():
+    async def main():
+        wakeup = asyncio.Event()
+        deadlines = [0.0]
+        fired = []
+
+        async def run_due(now):
+            while deadlines and deadlines[0] <= now:
+                fired.append(deadlines.pop(0))
+
+        task = asyncio.get_running_loop().create_task(
+            run_deadline_loop("测试调度器", wakeup, run_due, lambda: deadlines[0] if deadlines else None))
+        await asyncio.sleep(0.01)
+        assert fired == [0.0]
+
+        deadlines.append(time.time() + 0.05)
+        wakeup.set()
+        await asyncio.sleep(0.2)
+        assert len(fired) == 2
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
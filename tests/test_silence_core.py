@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from plugins.silence_plugin.silence_watcher import SilenceWatcher
+from plugins.silence_plugin.storage import JsonJournalStorage
+
+def test_add_and_remove_silence(silence_core):
+    async def main():
+        assert await silence_core.add_silence(True, None, "s", None, ["reply"], [])
+        assert silence_core.is_silenced("s")
+        assert not await silence_core.add_silence(True, None, "s", None, ["reply"], [])
+        assert await silence_core.remove_silence(True, None, "s")
+        assert not silence_core.is_silenced("s")
+        assert not await silence_core.remove_silence(True, None, "s")
+
+    asyncio.run(main())
+    silence_core.flush()
+    assert JsonJournalStorage(silence_core._storage.snapshot_file).load_all() == {}
+
+def test_expiry_scheduler_ends_silence_and_wakes_waiter(silence_core):
+    async def main():
+        assert await silence_core.add_silence(True, None, "s", 0.05, ["reply"], [])
+        reason = await asyncio.wait_for(SilenceWatcher.wait("s"), 5)
+        assert reason == "expired"
+        assert "s" not in silence_core._data
+
+    asyncio.run(main())
+
+def test_mention_wakes_waiter(silence_core):
+    async def main():
+        await silence_core.add_silence(True, None, "s", None, ["reply"], [])
+        waiter = asyncio.ensure_future(SilenceWatcher.wait("s"))
+        await asyncio.sleep(0)
+        SilenceWatcher.notify_mention("s")
+        assert await asyncio.wait_for(waiter, 5) == "mention"
+
+    asyncio.run(main())
+
+def test_restart_restores_active_and_drops_expired(silence_core, tmp_path):
+    silence_core._put("active", {"expiration": time.time() + 3600, "components": None, "source": "command"})
+    silence_core._put("expired", {"expiration": time.time() - 1, "components": None, "source": "command"})
+    silence_core.flush()
+    silence_core._storage.close()
+
+    silence_core._data, silence_core._pending = {}, {}
+    silence_core.init(str(tmp_path / "silence_restrictions.json"), flush_delay=0.01)
+    assert silence_core.reconcile() == (1, 1)
+    assert silence_core.is_silenced("active")
+    assert set(JsonJournalStorage(silence_core._storage.snapshot_file).load_all()) == {"active"}
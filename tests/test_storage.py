@@ -0,0 +1,82 @@
+import json
+import sqlite3
+
+import pytest
+
+from plugins.silence_plugin.storage import ShardedStorage, SqliteStorage, StorageBackend, create_storage
+
+RECORD = {"expiration": 100.0, "components": "set", "source": "command"}
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "sharded"])
+def test_backend_round_trip(tmp_path, backend):
+    json_file = str(tmp_path / "silence_restrictions.json")
+    storage = create_storage(backend, json_file)
+    storage.ensure()
+    storage.apply_batch({"a": RECORD, "b": RECORD})
+    storage.apply_batch({"a": None})
+    storage.save_component_sets({"set": {"actions": ["reply"], "commands": []}}, set())
+    storage.save_schedules({"b": {"start": 0, "end": 60, "days": [0]}})
+    storage.close()
+
+    reopened = create_storage(backend, json_file)
+    reopened.ensure()
+    assert reopened.load_all() == {"b": RECORD}
+    assert reopened.load_component_sets() == {"set": {"actions": ["reply"], "commands": []}}
+    assert list(reopened.load_schedules()) == ["b"]
+    reopened.close()
+
+@pytest.mark.parametrize("backend", ["sqlite", "sharded"])
+def test_legacy_json_is_migrated(tmp_path, backend):
+    json_file = tmp_path / "silence_restrictions.json"
+    json_file.write_text(json.dumps({"a": RECORD}), encoding="utf-8")
+    storage = create_storage(backend, str(json_file))
+    storage.ensure()
+    assert storage.load_all() == {"a": RECORD}
+    assert not json_file.exists() and (tmp_path / "silence_restrictions.json.migrated").exists()
+    storage.close()
+
+def test_sharded_migration_interrupted_before_index_is_retried(tmp_path, monkeypatch):
+    """迁移中途崩溃时还没有写入索引，下次启动重新迁移而不是得到空的存储"""
+    json_file = tmp_path / "silence_restrictions.json"
+    json_file.write_text(json.dumps({"a": RECORD}), encoding="utf-8")
+
+    def crash(self, changes):
+        raise OSError("迁移中途崩溃")
+    with monkeypatch.context() as patch:
+        patch.setattr(ShardedStorage, "_write_buckets", crash)
+        with pytest.raises(OSError):
+            create_storage("sharded", str(json_file)).ensure()
+    assert json_file.exists()
+
+    storage = create_storage("sharded", str(json_file))
+    storage.ensure()
+    assert storage.load_all() == {"a": RECORD}
+    storage.close()
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+def test_sqlite_opens_database_with_old_schema(tmp_path):
+    db_file = str(tmp_path / "silence_restrictions.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE silence (stream_id TEXT PRIMARY KEY, expiration REAL, data TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+    storage = SqliteStorage(db_file)
+    storage.ensure()
+    storage.apply_batch({"a": RECORD})
+    assert storage.load_all() == {"a": RECORD}
+    storage.close()
+
+def test_sharded_reports_only_changed_bucket(tmp_path):
+    storage = ShardedStorage(str(tmp_path / "shards"))
+    storage.ensure()
+    storage.apply_batch({f"s{i}": RECORD for i in range(50)})
+    reader = ShardedStorage(str(tmp_path / "shards"))
+    reader.ensure()
+    reader.load_all()
+    storage.apply_batch({"s1": None})
+    changes = reader.load_changes()
+    assert changes.pop("s1") is None
+    assert {storage._bucket_of(stream_id) for stream_id in changes} <= {storage._bucket_of("s1")}